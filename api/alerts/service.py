@@ -4,20 +4,48 @@ from __future__ import annotations
 
 import asyncio
 import smtplib
+import threading
 from email.message import EmailMessage
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Set, Tuple
 
 import httpx
+import orjson
 from loguru import logger
 
 from ..config import Settings
 
 
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+def _dump_metadata(metadata: Dict[str, Any]) -> str:
+    return orjson.dumps(metadata, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 class AlertService:
     """Dispatch security alerts to configured channels."""
 
     def __init__(self, settings: Settings):
         self.settings = settings
+        self._http: Optional[httpx.AsyncClient] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+
+    def _http_client(self) -> httpx.AsyncClient:
+        """Return the shared keep-alive client, creating it on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=5.0,
+                limits=httpx.Limits(max_keepalive_connections=10),
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Release pooled transport connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        await asyncio.to_thread(self._close_smtp)
 
     @property
     def enabled(self) -> bool:
@@ -39,11 +67,14 @@ class AlertService:
 
     async def _send_slack(self, subject: str, message: str, metadata: Dict[str, Any]) -> None:
         payload = {
-            "text": f"*{subject}*\n{message}\n```{metadata}```",
+            "text": f"*{subject}*\n{message}\n```{_dump_metadata(metadata)}```",
         }
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                await client.post(self.settings.slack_webhook_url, json=payload)
+            await self._http_client().post(
+                self.settings.slack_webhook_url,
+                content=orjson.dumps(payload),
+                headers=_JSON_HEADERS,
+            )
         except Exception as exc:  # pragma: no cover - best effort network
             logger.warning("Failed to send Slack alert: {}", exc)
 
@@ -55,7 +86,7 @@ class AlertService:
         email["Subject"] = subject
         email["From"] = self.settings.smtp_from or self.settings.smtp_user
         email["To"] = self.settings.smtp_to
-        email.set_content(f"{message}\n\nMetadata:\n{metadata}")
+        email.set_content(f"{message}\n\nMetadata:\n{_dump_metadata(metadata)}")
         try:
             await asyncio.to_thread(
                 self._send_email_blocking,
@@ -65,7 +96,143 @@ class AlertService:
             logger.warning("Failed to send email alert: {}", exc)
 
     def _send_email_blocking(self, email: EmailMessage) -> None:
-        with smtplib.SMTP(self.settings.smtp_host, self.settings.smtp_port) as smtp:
+        with self._smtp_lock:
+            smtp = self._smtp_connection()
+            try:
+                smtp.send_message(email)
+            except smtplib.SMTPServerDisconnected:
+                self._discard_smtp()
+                self._smtp_connection().send_message(email)
+
+    def _smtp_connection(self) -> smtplib.SMTP:
+        """Return a live, authenticated SMTP session; caller must hold the lock."""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._discard_smtp()
+        smtp = smtplib.SMTP(self.settings.smtp_host, self.settings.smtp_port)
+        try:
             smtp.starttls()
             smtp.login(self.settings.smtp_user, self.settings.smtp_pass)
-            smtp.send_message(email)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        return smtp
+
+    def _discard_smtp(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.close()
+            finally:
+                self._smtp = None
+
+    def _close_smtp(self) -> None:
+        with self._smtp_lock:
+            if self._smtp is None:
+                return
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            self._discard_smtp()
+
+
+# Keyed by settings identity; each service keeps its settings alive, so ids stay unique.
+_alert_services: Dict[int, AlertService] = {}
+
+
+def get_alert_service(settings: Settings) -> AlertService:
+    """Return the shared alert service for ``settings`` so transports are pooled across requests."""
+    service = _alert_services.get(id(settings))
+    if service is None:
+        service = _alert_services[id(settings)] = AlertService(settings)
+    return service
+
+
+async def close_alert_service() -> None:
+    """Close pooled alert transports during application shutdown."""
+    services = list(_alert_services.values())
+    _alert_services.clear()
+    for service in services:
+        await service.aclose()
+
+
+ALERT_QUEUE_MAXSIZE = 1000
+
+AlertJob = Tuple[AlertService, str, str, Dict[str, Any]]
+
+dropped_alerts = 0
+# Owned by the running alert_worker; created on its loop and cleared when it stops.
+_alert_queue: "Optional[asyncio.Queue[AlertJob]]" = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_direct_deliveries: Set["asyncio.Task[None]"] = set()
+
+
+def _put_alert(queue: "asyncio.Queue[AlertJob]", job: AlertJob) -> None:
+    global dropped_alerts
+    try:
+        queue.put_nowait(job)
+    except asyncio.QueueFull:
+        dropped_alerts += 1
+        logger.warning("Alert queue full; dropped '{}' ({} dropped so far)", job[1], dropped_alerts)
+
+
+def _deliver_directly(job: AlertJob) -> None:
+    service, subject, message, metadata = job
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        asyncio.run(service.notify(subject, message, metadata))
+        return
+    task = loop.create_task(service.notify(subject, message, metadata))
+    _direct_deliveries.add(task)
+    task.add_done_callback(_direct_deliveries.discard)
+
+
+def enqueue_alert(
+    service: AlertService,
+    subject: str,
+    message: str,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Queue an alert for the background worker, dropping it if the queue is full.
+
+    Without a running worker (scripts, tests, lifespan disabled) the alert is
+    delivered directly instead.
+    """
+    job: AlertJob = (service, subject, message, metadata or {})
+    queue, worker_loop = _alert_queue, _worker_loop
+    if queue is None or worker_loop is None:
+        _deliver_directly(job)
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is worker_loop:
+        _put_alert(queue, job)
+    else:
+        # Called from a worker thread (sync route); hand off to the loop that owns the queue.
+        worker_loop.call_soon_threadsafe(_put_alert, queue, job)
+
+
+async def alert_worker() -> None:
+    """Consume queued alerts until cancelled."""
+    global _alert_queue, _worker_loop
+    queue: "asyncio.Queue[AlertJob]" = asyncio.Queue(maxsize=ALERT_QUEUE_MAXSIZE)
+    _alert_queue, _worker_loop = queue, asyncio.get_running_loop()
+    try:
+        while True:
+            service, subject, message, metadata = await queue.get()
+            try:
+                await service.notify(subject, message, metadata)
+            except Exception as exc:  # pragma: no cover - best effort network
+                logger.warning("Alert delivery failed for '{}': {}", subject, exc)
+            finally:
+                queue.task_done()
+    finally:
+        _alert_queue = _worker_loop = None
@@ -6,34 +6,65 @@ from datetime import timedelta
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import and_, select
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 
 from ..deps import get_db, require_any_role
 from ..models import AuditEvent
-from ..schemas import AuditEventOut, AuditListOut
+from ..responses import UTCJSONResponse
+from ..schemas import AuditListOut, coerce_metadata
 from ..utils.time import utcnow
 
 router = APIRouter()
 
 
-@router.get("", response_model=AuditListOut, dependencies=[Depends(require_any_role("admin", "moderator"))])
+DEFAULT_WINDOW_HOURS = 168
+_AUDIT_COLUMNS = (
+    AuditEvent.id,
+    AuditEvent.ts,
+    AuditEvent.user_id,
+    AuditEvent.event_type,
+    AuditEvent.ip,
+    AuditEvent.user_agent,
+    AuditEvent.meta.label("metadata"),
+)
+
+
+@router.get(
+    "",
+    response_model=AuditListOut,
+    dependencies=[Depends(require_any_role("admin", "moderator"))],
+)
 def list_audit_events(
     user_id: Optional[int] = Query(None),
     event_type: Optional[str] = Query(None),
     hours: Optional[int] = Query(None, ge=1, le=720),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, ge=1, description="Return events older than this event id."),
     db: Session = Depends(get_db),
-) -> AuditListOut:
-    stmt = select(AuditEvent).order_by(AuditEvent.ts.desc())
-    clauses = []
+) -> UTCJSONResponse:
+    if not hours and not user_id and not event_type:
+        hours = DEFAULT_WINDOW_HOURS
+    stmt = select(*_AUDIT_COLUMNS)
     if user_id:
-        clauses.append(AuditEvent.user_id == user_id)
+        stmt = stmt.where(AuditEvent.user_id == user_id)
     if event_type:
-        clauses.append(AuditEvent.event_type == event_type)
+        stmt = stmt.where(AuditEvent.event_type == event_type)
     if hours:
-        clauses.append(AuditEvent.ts >= utcnow() - timedelta(hours=hours))
-    if clauses:
-        stmt = stmt.where(and_(*clauses))
-    events = db.execute(stmt).scalars().all()
-    payload = [AuditEventOut.from_orm(event) for event in events]
-    return AuditListOut(events=payload)
+        # Keep ``ts`` bare so the predicate stays sargable against the ts DESC indexes.
+        cutoff = utcnow() - timedelta(hours=hours)
+        stmt = stmt.where(AuditEvent.ts >= bindparam("cutoff", cutoff))
+    if cursor:
+        # Keyset pagination: seek past the last seen id instead of paying for OFFSET.
+        stmt = stmt.where(AuditEvent.id < cursor)
+    # Order by the cursor column alone: ``ts`` is not monotonic in ``id`` (Postgres
+    # now() is the transaction start, streamed events keep their event time), so
+    # a ``ts``-first ordering would make an ``id`` cursor skip or repeat rows.
+    stmt = stmt.order_by(AuditEvent.id.desc()).limit(limit)
+    # Returning a Response skips response_model validation; the rows already have
+    # the AuditEventOut shape, so only metadata needs normalising.
+    events = [dict(row) for row in db.execute(stmt).mappings()]
+    for event in events:
+        event["metadata"] = coerce_metadata(event["metadata"])
+    next_cursor = events[-1]["id"] if len(events) == limit else None
+    return UTCJSONResponse({"events": events, "next_cursor": next_cursor})
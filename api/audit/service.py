@@ -3,19 +3,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
-
-import asyncio
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
 
 from loguru import logger
+from sqlalchemy import delete, event, insert, select
 from sqlalchemy.orm import Session
 
-from ..alerts.service import AlertService
+from ..alerts.service import AlertService, enqueue_alert, get_alert_service
 from ..config import Settings
+from ..db import db_session
 from ..models import AuditEvent, User
+from ..utils.time import utcnow
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SuspiciousLoginResult:
     severity: str
     reason: Optional[str] = None
@@ -24,6 +27,15 @@ class SuspiciousLoginResult:
         return self.severity in {"medium", "high"}
 
 
+_SEVERITY = ("low", "medium", "medium", "high")
+LOW_RISK = SuspiciousLoginResult(severity="low")
+
+PURGE_BATCH_SIZE = 5000
+
+_PENDING_KEY = "audit_pending"
+_STREAM_PENDING_KEY = "audit_stream_pending"
+
+
 def suspicious_login_check(
     previous_ip: Optional[str],
     previous_ua: Optional[str],
@@ -31,15 +43,18 @@ def suspicious_login_check(
     new_ua: Optional[str],
 ) -> SuspiciousLoginResult:
     """Very simple heuristic for suspicious logins."""
-    reasons = []
-    if previous_ip and new_ip and previous_ip != new_ip:
-        reasons.append(f"IP changed from {previous_ip} to {new_ip}")
-    if previous_ua and new_ua and previous_ua != new_ua:
-        reasons.append("User agent changed")
-    if not reasons:
-        return SuspiciousLoginResult(severity="low")
-    severity = "high" if len(reasons) > 1 else "medium"
-    return SuspiciousLoginResult(severity=severity, reason="; ".join(reasons))
+    ip_changed = bool(previous_ip and new_ip and previous_ip != new_ip)
+    ua_changed = bool(previous_ua and new_ua and previous_ua != new_ua)
+    mask = (ip_changed << 1) | ua_changed
+    if not mask:
+        return LOW_RISK
+    if mask == 0b11:
+        reason = f"IP changed from {previous_ip} to {new_ip}; User agent changed"
+    elif ip_changed:
+        reason = f"IP changed from {previous_ip} to {new_ip}"
+    else:
+        reason = "User agent changed"
+    return SuspiciousLoginResult(severity=_SEVERITY[mask], reason=reason)
 
 
 def record_event(
@@ -51,25 +66,103 @@ def record_event(
     user_agent: Optional[str],
     metadata: Optional[Dict[str, Any]] = None,
     alert_service: Optional[AlertService] = None,
+    deferred: bool = False,
 ) -> None:
-    """Persist an audit event and dispatch alerts if necessary."""
-    event = AuditEvent(
-        user_id=user.id if user else None,
-        event_type=event_type,
-        ip=ip,
-        user_agent=user_agent,
-        meta=metadata,
-    )
-    session.add(event)
+    """Persist an audit event and dispatch alerts if necessary.
+
+    Non-alerting events are buffered on the session and written with a single
+    multi-row INSERT when the session commits. ``deferred`` events are held for
+    the caller to hand to the audit stream once the commit succeeds.
+    """
+    row = {
+        "user_id": user.id if user else None,
+        "event_type": event_type,
+        "ip": ip,
+        "user_agent": user_agent,
+        "meta": metadata,
+    }
+    if deferred:
+        # Stamp now: the stream consumer may persist the row well after the event.
+        # The key lets a redelivered stream entry be recognised as already written.
+        row["ts"] = utcnow()
+        row["event_key"] = uuid4().hex
+        _buffer(session, _STREAM_PENDING_KEY).append(row)
+        return
+    write_event_row(session, settings, row, alert_service)
+
+
+def write_event_row(
+    session: Session,
+    settings: Settings,
+    row: Dict[str, Any],
+    alert_service: Optional[AlertService] = None,
+) -> None:
+    """Persist a prepared audit row, alerting on medium/high severity."""
+    metadata = row["meta"]
+    if not (metadata and metadata.get("severity") in {"medium", "high"}):
+        _buffer(session, _PENDING_KEY).append(row)
+        return
+
+    flush_pending_events(session)
+    session.add(AuditEvent(**row))
     session.flush()
 
-    if metadata and metadata.get("severity") in {"medium", "high"}:
-        alert_service = alert_service or AlertService(settings)
-        subject = f"SentinelAuth alert: {event_type}"
-        message = metadata.get("reason", "Security event detected")
-        logger.info("Triggering alert for {} severity {}", event_type, metadata.get("severity"))
-        try:
-            loop = asyncio.get_running_loop()
-            loop.create_task(alert_service.notify(subject, message, metadata))
-        except RuntimeError:  # pragma: no cover - background tasks during sync contexts
-            asyncio.run(alert_service.notify(subject, message, metadata))
+    event_type = row["event_type"]
+    alert_service = alert_service or get_alert_service(settings)
+    subject = f"SentinelAuth alert: {event_type}"
+    message = metadata.get("reason", "Security event detected")
+    logger.info("Triggering alert for {} severity {}", event_type, metadata.get("severity"))
+    enqueue_alert(alert_service, subject, message, metadata)
+
+
+def _buffer(session: Session, key: str) -> List[Dict[str, Any]]:
+    # Begin the transaction eagerly so a rollback always discards the buffer.
+    if not session.in_transaction():
+        session.begin()
+    return session.info.setdefault(key, [])
+
+
+def flush_pending_events(session: Session) -> None:
+    """Write buffered audit events for ``session`` in one statement."""
+    rows = session.info.pop(_PENDING_KEY, None)
+    if rows:
+        session.execute(insert(AuditEvent), rows)
+
+
+def take_deferred_events(session: Session) -> List[Dict[str, Any]]:
+    """Return and clear the rows recorded with ``deferred=True``."""
+    return session.info.pop(_STREAM_PENDING_KEY, [])
+
+
+@event.listens_for(Session, "before_commit")
+def _flush_pending_on_commit(session: Session) -> None:
+    flush_pending_events(session)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_on_rollback(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_STREAM_PENDING_KEY, None)
+
+
+def purge_expired_events(settings: Settings, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Delete audit events older than the configured retention window.
+
+    Rows go in bounded batches, each in its own transaction, so a large backlog
+    never holds one long-running DELETE.
+    """
+    cutoff = utcnow() - timedelta(days=settings.audit_retention_days)
+    expired = select(AuditEvent.id).where(AuditEvent.ts < cutoff).limit(batch_size)
+    total = 0
+    while True:
+        with db_session(settings) as session:
+            result = session.execute(
+                delete(AuditEvent).where(AuditEvent.id.in_(expired)).execution_options(synchronize_session=False)
+            )
+        deleted = result.rowcount or 0
+        total += deleted
+        if deleted < batch_size:
+            break
+    if total:
+        logger.info("Purged {} audit events older than {}", total, cutoff)
+    return total
@@ -0,0 +1,223 @@
+"""Redis Stream offload for audit events recorded on the auth hot path."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import anyio
+import orjson
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+from sqlalchemy import select
+
+from ..alerts.service import AlertService
+from ..config import Settings
+from ..db import db_session
+from ..models import AuditEvent
+from ..redis_client import get_redis_client_by_url
+from .service import write_event_row
+
+AUDIT_STREAM_KEY = "audit_stream"
+AUDIT_STREAM_GROUP = "audit_writers"
+AUDIT_DEAD_LETTER_KEY = "audit_stream:dead"
+MAX_DELIVERIES = 5
+_CONSUMER_BATCH_SIZE = 100
+_CONSUMER_BLOCK_MS = 5000
+_CLAIM_IDLE_MS = 60_000
+
+StreamEntry = Tuple[Union[str, bytes], Dict[Any, Any]]
+
+_consumer_active = False
+
+
+def consumer_running() -> bool:
+    """Whether this process is draining the audit stream."""
+    return _consumer_active
+
+
+def _text(value: Union[str, bytes]) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _field(fields: Dict[Any, Any], name: str) -> Union[str, bytes]:
+    return fields[name] if name in fields else fields[name.encode()]
+
+
+async def publish_events(redis: Redis, rows: Iterable[Dict[str, Any]]) -> None:
+    """Append audit rows to the stream in a single round-trip.
+
+    The stream is never trimmed here: entries are only dropped once acknowledged.
+    """
+    pipe = redis.pipeline(transaction=False)
+    for row in rows:
+        pipe.xadd(AUDIT_STREAM_KEY, {"row": orjson.dumps(row, default=str)})
+    await pipe.execute()
+
+
+def _decode_row(fields: Dict[Any, Any]) -> Dict[str, Any]:
+    row = orjson.loads(_text(_field(fields, "row")))
+    if row.get("ts"):
+        row["ts"] = datetime.fromisoformat(row["ts"])
+    return row
+
+
+def _write_rows(settings: Settings, rows: List[Dict[str, Any]], alert_service: Optional[AlertService]) -> None:
+    with db_session(settings) as session:
+        keys = [row["event_key"] for row in rows if row.get("event_key")]
+        written = (
+            set(session.scalars(select(AuditEvent.event_key).where(AuditEvent.event_key.in_(keys))))
+            if keys
+            else set()
+        )
+        for row in rows:
+            key = row.get("event_key")
+            if key in written:
+                continue
+            write_event_row(session, settings, row, alert_service)
+            if key:
+                written.add(key)
+
+
+def persist_rows(
+    settings: Settings,
+    rows: List[Dict[str, Any]],
+    alert_service: Optional[AlertService] = None,
+) -> List[int]:
+    """Write audit rows (and dispatch their alerts); return indexes of rows that failed.
+
+    Rows already stored under the same ``event_key`` are skipped, so a
+    redelivered batch is not written twice. When the batch transaction fails,
+    rows are retried one at a time so a single bad row cannot sink the rest.
+    """
+    try:
+        _write_rows(settings, rows, alert_service)
+        return []
+    except Exception as exc:
+        if len(rows) == 1:
+            logger.error("Failed to persist audit event: {}", exc)
+            return [0]
+        logger.warning("Audit batch of {} failed, retrying rows individually: {}", len(rows), exc)
+
+    failed = []
+    for index, row in enumerate(rows):
+        try:
+            _write_rows(settings, [row], alert_service)
+        except Exception as exc:
+            logger.error("Failed to persist audit event {}: {}", row.get("event_key"), exc)
+            failed.append(index)
+    return failed
+
+
+async def ensure_consumer_group(redis: Redis) -> None:
+    try:
+        await redis.xgroup_create(AUDIT_STREAM_KEY, AUDIT_STREAM_GROUP, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+async def _persist_and_ack(settings: Settings, redis: Redis, messages: Sequence[StreamEntry]) -> int:
+    if not messages:
+        return 0
+    rows = [_decode_row(fields) for _, fields in messages]
+    failed = set(await anyio.to_thread.run_sync(persist_rows, settings, rows))
+    # Failed entries stay pending; they are reclaimed later or dead-lettered.
+    done = [message_id for index, (message_id, _) in enumerate(messages) if index not in failed]
+    if done:
+        await redis.xack(AUDIT_STREAM_KEY, AUDIT_STREAM_GROUP, *done)
+    return len(done)
+
+
+async def consume_batch(
+    settings: Settings,
+    redis: Redis,
+    consumer: str,
+    block_ms: Optional[int] = None,
+) -> int:
+    """Persist and acknowledge one batch of new stream entries; return its size."""
+    response = await redis.xreadgroup(
+        AUDIT_STREAM_GROUP,
+        consumer,
+        {AUDIT_STREAM_KEY: ">"},
+        count=_CONSUMER_BATCH_SIZE,
+        block=block_ms,
+    )
+    messages = response[0][1] if response else []
+    return await _persist_and_ack(settings, redis, messages)
+
+
+async def claim_idle(settings: Settings, redis: Redis, consumer: str, min_idle_ms: int = _CLAIM_IDLE_MS) -> int:
+    """Take over entries left unacknowledged by any consumer (including crashed ones)."""
+    _, messages, _ = await redis.xautoclaim(
+        AUDIT_STREAM_KEY,
+        AUDIT_STREAM_GROUP,
+        consumer,
+        min_idle_time=min_idle_ms,
+        start_id="0-0",
+        count=_CONSUMER_BATCH_SIZE,
+    )
+    return await _persist_and_ack(settings, redis, messages)
+
+
+async def dead_letter_exhausted(redis: Redis) -> int:
+    """Move entries delivered ``MAX_DELIVERIES`` times to the dead-letter stream."""
+    pending = await redis.xpending_range(
+        AUDIT_STREAM_KEY, AUDIT_STREAM_GROUP, min="-", max="+", count=_CONSUMER_BATCH_SIZE
+    )
+    exhausted = [entry["message_id"] for entry in pending if entry["times_delivered"] >= MAX_DELIVERIES]
+    for message_id in exhausted:
+        for _, fields in await redis.xrange(AUDIT_STREAM_KEY, message_id, message_id):
+            await redis.xadd(AUDIT_DEAD_LETTER_KEY, {"row": _field(fields, "row"), "source_id": message_id})
+        await redis.xack(AUDIT_STREAM_KEY, AUDIT_STREAM_GROUP, message_id)
+        logger.error(
+            "Audit stream entry {} moved to {} after {} deliveries",
+            _text(message_id),
+            AUDIT_DEAD_LETTER_KEY,
+            MAX_DELIVERIES,
+        )
+    return len(exhausted)
+
+
+async def audit_consumer(
+    settings: Settings,
+    redis: Optional[Redis] = None,
+    block_ms: int = _CONSUMER_BLOCK_MS,
+    claim_idle_ms: int = _CLAIM_IDLE_MS,
+) -> None:
+    """Drain the audit stream into the database for the lifetime of the app."""
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    redis = redis or await get_redis_client_by_url(settings.redis_url)
+    await ensure_consumer_group(redis)
+
+    global _consumer_active
+    _consumer_active = True
+    try:
+        await _consume_forever(settings, redis, consumer, block_ms, claim_idle_ms)
+    finally:
+        _consumer_active = False
+
+
+async def _consume_forever(
+    settings: Settings,
+    redis: Redis,
+    consumer: str,
+    block_ms: int,
+    claim_idle_ms: int,
+) -> None:
+    while True:
+        try:
+            # Failed batches stay pending and are retried via XAUTOCLAIM once idle,
+            # until they hit the delivery cap and are dead-lettered.
+            await dead_letter_exhausted(redis)
+            await claim_idle(settings, redis, consumer, claim_idle_ms)
+            await consume_batch(settings, redis, consumer, block_ms)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pragma: no cover - best effort background work
+            logger.warning("Audit stream consumer error: {}", exc)
+            await asyncio.sleep(1)
@@ -0,0 +1,97 @@
+"""Batched login-attempt persistence, kept off the login request path."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import anyio
+from loguru import logger
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..config import Settings
+from ..db import db_session
+from ..models import LoginAttempt
+from ..utils.time import utcnow
+
+LOGIN_ATTEMPT_QUEUE_MAXSIZE = 10_000
+_FLUSH_BATCH_SIZE = 500
+_FLUSH_INTERVAL_SECONDS = 0.1
+
+AttemptRow = Dict[str, Any]
+
+dropped_attempts = 0
+# Owned by the running login_attempt_writer; created on its loop and cleared when it stops.
+_attempt_queue: "Optional[asyncio.Queue[AttemptRow]]" = None
+_writer_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def record_login_attempt(session: Session, email: str, ip: str, user_agent: str, success: bool) -> None:
+    """Queue a login attempt for the background writer, dropping it if the queue is full.
+
+    Without a running writer (scripts, tests, lifespan disabled) the row is
+    inserted through ``session`` instead.
+    """
+    row: AttemptRow = {"ts": utcnow(), "email": email, "ip": ip, "user_agent": user_agent, "success": success}
+    queue, writer_loop = _attempt_queue, _writer_loop
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if queue is None or running is not writer_loop:
+        session.execute(insert(LoginAttempt), [row])
+        return
+    global dropped_attempts
+    try:
+        queue.put_nowait(row)
+    except asyncio.QueueFull:
+        dropped_attempts += 1
+        logger.warning("Login attempt queue full; dropped attempt ({} dropped so far)", dropped_attempts)
+
+
+def _write_batch(settings: Settings, rows: List[AttemptRow]) -> None:
+    with db_session(settings) as session:
+        session.execute(insert(LoginAttempt), rows)
+
+
+async def _collect_batch(queue: "asyncio.Queue[AttemptRow]", batch: List[AttemptRow]) -> None:
+    batch.append(await queue.get())
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _FLUSH_INTERVAL_SECONDS
+    while len(batch) < _FLUSH_BATCH_SIZE:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+
+
+async def login_attempt_writer(settings: Settings) -> None:
+    """Insert queued login attempts in batches until cancelled."""
+    global _attempt_queue, _writer_loop
+    queue: "asyncio.Queue[AttemptRow]" = asyncio.Queue(maxsize=LOGIN_ATTEMPT_QUEUE_MAXSIZE)
+    _attempt_queue, _writer_loop = queue, asyncio.get_running_loop()
+    # Rows collected but not yet handed to a write; flushed on shutdown.
+    batch: List[AttemptRow] = []
+    try:
+        while True:
+            await _collect_batch(queue, batch)
+            pending = batch[:]
+            batch.clear()
+            try:
+                await anyio.to_thread.run_sync(_write_batch, settings, pending)
+            except Exception as exc:  # pragma: no cover - best effort bookkeeping
+                logger.warning("Failed to write {} login attempts: {}", len(pending), exc)
+    finally:
+        _attempt_queue = _writer_loop = None
+        remaining = batch
+        while not queue.empty():
+            remaining.append(queue.get_nowait())
+        if remaining:
+            try:
+                _write_batch(settings, remaining)
+            except Exception as exc:  # pragma: no cover - best effort bookkeeping
+                logger.warning("Failed to write {} login attempts on shutdown: {}", len(remaining), exc)
@@ -0,0 +1,96 @@
+"""Refresh-token jti cache backends selected from ``REFRESH_PERSISTENCE``."""
+
+from __future__ import annotations
+
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+from redis.asyncio import Redis
+
+from ..config import Settings
+from ..redis_client import cache_refresh_jti, delete_refresh_jti, rotate_refresh_jti
+
+RedisGetter = Callable[[], Awaitable[Optional[Redis]]]
+
+
+class RefreshPersistenceError(Exception):
+    """Raised when durable refresh persistence fails."""
+
+
+class RefreshCache:
+    """Database-only persistence: there is nothing to mirror."""
+
+    # Set once a relaxed backend has fallen back to DB-only behaviour.
+    degraded = False
+
+    async def store(self, jti: str, user_id: int, ttl_seconds: int, replaces_jti: Optional[str] = None) -> None:
+        return None
+
+    async def delete(self, jti: str) -> None:
+        return None
+
+
+class RedisRefreshCache(RefreshCache):
+    """Mirror refresh jtis into Redis; any Redis failure is fatal."""
+
+    def __init__(self, get_client: RedisGetter):
+        self._get_client = get_client
+        self._client: Optional[Redis] = None
+        self._resolved = False
+
+    async def _client_or_none(self) -> Optional[Redis]:
+        if not self._resolved:
+            self._client = await self._get_client()
+            self._resolved = True
+        if self._client is None:
+            self._unavailable()
+        return self._client
+
+    def _unavailable(self) -> None:
+        raise RefreshPersistenceError("Redis persistence required but unavailable")
+
+    def _failed(self, action: str, exc: Exception) -> None:
+        raise RefreshPersistenceError(f"Redis failed to {action}") from exc
+
+    async def store(self, jti: str, user_id: int, ttl_seconds: int, replaces_jti: Optional[str] = None) -> None:
+        client = await self._client_or_none()
+        if client is None:
+            return
+        try:
+            if replaces_jti:
+                await rotate_refresh_jti(replaces_jti, jti, user_id, ttl_seconds, client=client)
+            else:
+                await cache_refresh_jti(jti, user_id, ttl_seconds, client=client)
+        except Exception as exc:
+            logger.warning("Failed to cache refresh token {}: {}", jti, exc)
+            self._failed("cache refresh token", exc)
+
+    async def delete(self, jti: str) -> None:
+        client = await self._client_or_none()
+        if client is None:
+            return
+        try:
+            await delete_refresh_jti(jti, client=client)
+        except Exception as exc:
+            logger.warning("Failed to delete cached refresh {}: {}", jti, exc)
+            self._failed("delete cached refresh token", exc)
+
+
+class RelaxedRedisRefreshCache(RedisRefreshCache):
+    """Dev-relaxed variant: Redis problems degrade to DB-only persistence."""
+
+    def _unavailable(self) -> None:
+        logger.warning("Redis persistence unavailable; continuing with DB-only storage")
+
+    def _failed(self, action: str, exc: Exception) -> None:
+        self._client = None
+        self.degraded = True
+
+
+def build_refresh_cache(settings: Settings, get_client: RedisGetter) -> RefreshCache:
+    """Pick the backend for the configured persistence mode."""
+    if settings.refresh_persistence != "redis":
+        return RefreshCache()
+    if settings.dev_relaxed_mode:
+        return RelaxedRedisRefreshCache(get_client)
+    return RedisRefreshCache(get_client)
@@ -2,14 +2,14 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from typing import Optional
 from redis.asyncio import Redis
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
 
 from ..config import Settings, get_settings
-from ..deps import get_current_user, get_db, get_redis, rate_limit_dependency
+from ..deps import get_current_user, get_db, get_redis
 from ..models import Session as SessionModel, User
 from ..schemas import (
     LoginIn,
@@ -20,14 +20,26 @@ from ..schemas import (
     TokenPair,
     UserOut,
 )
-from ..ratelimit import rate_limit_or_raise
-from ..utils.ip import client_ip, user_agent
+from ..ratelimit import RateLimitRule, rate_limit_many_or_raise
 from .service import AuthService
 
 router = APIRouter()
 
-register_rate_limit = rate_limit_dependency("register", capacity=3, period_seconds=60, detail="Too many registrations")
-login_rate_limit = rate_limit_dependency("login", capacity=5, period_seconds=60, detail="Too many login attempts")
+SESSIONS_PAGE_SIZE = 50
+
+
+def _register_rate_limits(ip: str, email: str) -> list[RateLimitRule]:
+    return [
+        RateLimitRule(f"rlz:register:ip:{ip}", 3, 60, "Too many registrations"),
+        RateLimitRule(f"rlz:register:email:{email}", 3, 300, "Too many registration attempts for this email"),
+    ]
+
+
+def _login_rate_limits(ip: str, email: str) -> list[RateLimitRule]:
+    return [
+        RateLimitRule(f"rlz:login:ip:{ip}", 5, 60, "Too many login attempts"),
+        RateLimitRule(f"rlz:login:email:{email}:{ip}", 5, 300, "Too many login attempts"),
+    ]
 
 
 def _service(
@@ -38,7 +50,7 @@ def _service(
     return AuthService(settings=settings, db=db, redis=redis)
 
 
-@router.post("/register", response_model=TokenPair, response_model_exclude_none=True, dependencies=[Depends(register_rate_limit)])
+@router.post("/register", response_model=TokenPair, response_model_exclude_none=True)
 async def register(
     payload: RegisterIn,
     request: Request,
@@ -46,22 +58,15 @@ async def register(
     db: Session = Depends(get_db),
     redis: Optional[Redis] = Depends(get_redis),
 ) -> TokenPair:
-    ip = client_ip(request)
-    ua = user_agent(request)
+    ip = request.state.ip
+    ua = request.state.ua
     service = _service(settings, db, redis)
-    await rate_limit_or_raise(
-        settings,
-        redis,
-        key=f"register:{payload.email.lower()}",
-        capacity=3,
-        period_seconds=300,
-        detail="Too many registration attempts for this email",
-    )
+    await rate_limit_many_or_raise(settings, redis, _register_rate_limits(ip, payload.email))
     _, tokens = await service.register(payload, ip, ua)
     return tokens
 
 
-@router.post("/login", response_model=TokenPair, response_model_exclude_none=True, dependencies=[Depends(login_rate_limit)])
+@router.post("/login", response_model=TokenPair, response_model_exclude_none=True)
 async def login(
     payload: LoginIn,
     request: Request,
@@ -69,16 +74,9 @@ async def login(
     db: Session = Depends(get_db),
     redis: Optional[Redis] = Depends(get_redis),
 ) -> TokenPair:
-    ip = client_ip(request)
-    ua = user_agent(request)
-    await rate_limit_or_raise(
-        settings,
-        redis,
-        key=f"login:{payload.email.lower()}:{ip}",
-        capacity=5,
-        period_seconds=300,
-        detail="Too many login attempts",
-    )
+    ip = request.state.ip
+    ua = request.state.ua
+    await rate_limit_many_or_raise(settings, redis, _login_rate_limits(ip, payload.email))
     _, tokens = await _service(settings, db, redis).login(payload, ip, ua)
     return tokens
 
@@ -91,8 +89,8 @@ async def refresh(
     db: Session = Depends(get_db),
     redis: Optional[Redis] = Depends(get_redis),
 ) -> TokenPair:
-    ip = client_ip(request)
-    ua = user_agent(request)
+    ip = request.state.ip
+    ua = request.state.ua
     _, tokens = await _service(settings, db, redis).refresh(payload.refresh_token, ip, ua)
     return tokens
 
@@ -100,12 +98,18 @@ async def refresh(
 @router.post("/logout", response_model=LogoutOut)
 async def logout(
     payload: RefreshIn,
+    request: Request,
     current_user: User = Depends(get_current_user),
     settings: Settings = Depends(get_settings),
     db: Session = Depends(get_db),
     redis: Optional[Redis] = Depends(get_redis),
 ) -> LogoutOut:
-    await _service(settings, db, redis).logout(payload.refresh_token, current_user)
+    await _service(settings, db, redis).logout(
+        payload.refresh_token,
+        current_user,
+        ip=request.state.ip,
+        user_agent=request.state.ua,
+    )
     return LogoutOut()
 
 
@@ -116,16 +120,15 @@ async def me(current_user: User = Depends(get_current_user)) -> UserOut:
 
 @router.get("/me/sessions", response_model=SessionListOut)
 async def my_sessions(
+    before_id: Optional[int] = Query(None, ge=1, description="Return sessions older than this session id."),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> SessionListOut:
-    sessions = (
-        db.execute(
-            select(SessionModel)
-            .where(SessionModel.user_id == current_user.id)
-            .order_by(SessionModel.created_at.desc())
-        )
-        .scalars()
-        .all()
-    )
-    return SessionListOut(sessions=sessions)
+    stmt = select(SessionModel).options(raiseload("*")).where(SessionModel.user_id == current_user.id)
+    if before_id:
+        stmt = stmt.where(SessionModel.id < before_id)
+    # Ordered by the cursor column so pages neither skip nor repeat sessions.
+    stmt = stmt.order_by(SessionModel.id.desc()).limit(SESSIONS_PAGE_SIZE)
+    sessions = db.execute(stmt).scalars().all()
+    next_before_id = sessions[-1].id if len(sessions) == SESSIONS_PAGE_SIZE else None
+    return SessionListOut(sessions=sessions, next_before_id=next_before_id)
@@ -2,59 +2,64 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Tuple, Sequence
-from uuid import uuid4
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import ClassVar, Optional, Tuple, Sequence
 
+import anyio
 from fastapi import HTTPException, status
-from jose import JWTError, jwt
+from jwt import PyJWTError
 from loguru import logger
 from pydantic import ValidationError
 from redis.asyncio import Redis
-from sqlalchemy import select
+from sqlalchemy import insert, select, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy.orm import Session
-
-from ..alerts.service import AlertService
-from ..audit.service import record_event, suspicious_login_check
-from ..config import Settings
-from ..models import LoginAttempt, RefreshToken, Role, Session as SessionModel, User
-from ..redis_client import (
-    cache_refresh_jti,
-    delete_refresh_jti,
-    get_redis_client_by_url,
-    is_refresh_jti_valid,
+from sqlalchemy.orm import Session, joinedload
+
+from ..alerts.service import AlertService, get_alert_service
+from ..audit.service import (
+    LOW_RISK,
+    SuspiciousLoginResult,
+    record_event,
+    suspicious_login_check,
+    take_deferred_events,
 )
+from ..audit.stream import consumer_running, persist_rows, publish_events
+from ..config import Settings
+from ..models import RefreshToken, Role, Session as SessionModel, User
+from ..redis_client import get_redis_client_by_url, is_known_device, remember_device
 from ..schemas import LoginIn, RegisterIn, TokenPair
 from ..security import (
-    ALGORITHM,
     decode_token,
+    encode_token,
     ensure_token_type,
     generate_token_pair,
-    hash_password,
-    now_utc,
-    verify_password,
+    hash_password_async,
+    needs_rehash,
+    verify_password_async,
 )
 from ..utils.ip import fingerprint
 from ..utils.time import utcnow
+from .attempts import record_login_attempt
+from .refresh_cache import RefreshPersistenceError, build_refresh_cache
 
 FALLBACK_REFRESH_WARNING = "DEV relaxed: refresh store unavailable, rotation skipped"
 FALLBACK_ACCESS_TTL_MINUTES = 5
+DEFAULT_ROLE = "user"
 
+_default_role_lock = threading.Lock()
 
-class RefreshPersistenceError(Exception):
-    """Raised when durable refresh persistence fails."""
 
-
-def _as_aware_utc(dt: Optional[datetime]) -> Optional[datetime]:
-    if dt is None:
-        return None
-    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+def reset_default_role_cache() -> None:
+    AuthService._default_role_id = None
 
 
 class AuthService:
     """Business logic for authentication flows."""
 
+    _default_role_id: ClassVar[Optional[int]] = None
+
     def __init__(
         self,
         settings: Settings,
@@ -65,7 +70,8 @@ class AuthService:
         self.settings = settings
         self.db = db
         self._redis_override = redis
-        self.alert_service = alert_service or AlertService(settings)
+        self.alert_service = alert_service or get_alert_service(settings)
+        self.refresh_cache = build_refresh_cache(settings, self._get_redis_client)
 
     async def _get_redis_client(self) -> Optional[Redis]:
         if self._redis_override is not None:
@@ -78,10 +84,62 @@ class AuthService:
             logger.warning("Unable to obtain Redis client: {}", exc)
             return None
 
+    async def _assess_login(
+        self,
+        event: str,
+        user_id: int,
+        prev_ip: Optional[str],
+        prev_ua: Optional[str],
+        ip: Optional[str],
+        user_agent: Optional[str],
+    ) -> SuspiciousLoginResult:
+        susp = suspicious_login_check(prev_ip, prev_ua, ip, user_agent)
+        # Registration has no history to compare against or to seed from.
+        if event == "user.register":
+            return susp
+        redis_client = await self._get_redis_client()
+        if redis_client is None:
+            return susp
+        try:
+            if not susp.is_alertworthy():
+                await remember_device(user_id, ip, user_agent, client=redis_client)
+            elif await is_known_device(user_id, ip, user_agent, client=redis_client):
+                # Switching back to a device this user logged in from recently.
+                return LOW_RISK
+        except Exception as exc:
+            logger.debug("Known-device check failed for user {}: {}", user_id, exc)
+        return susp
+
+    async def _commit(self) -> None:
+        """Commit, then hand any deferred audit rows to the audit stream."""
+        self.db.commit()
+        rows = take_deferred_events(self.db)
+        if not rows:
+            return
+        # Only publish when this process drains the stream; otherwise rows would
+        # sit unconsumed, so write them inline instead.
+        if consumer_running():
+            redis_client = await self._get_redis_client()
+            if redis_client is not None:
+                try:
+                    await publish_events(redis_client, rows)
+                    return
+                except Exception as exc:
+                    logger.warning("Audit stream publish failed; writing inline: {}", exc)
+        await anyio.to_thread.run_sync(persist_rows, self.settings, rows, self.alert_service)
+
     def _default_role(self) -> Role:
-        role = self.db.execute(select(Role).where(Role.name == "user")).scalar_one_or_none()
-        if not role:
-            role = Role(name="user")
+        role_id = AuthService._default_role_id
+        if role_id is not None:
+            # Attach the cached row without a SELECT; only the association is written.
+            return self.db.merge(Role(id=role_id, name=DEFAULT_ROLE), load=False)
+        role = self.db.execute(select(Role).where(Role.name == DEFAULT_ROLE)).scalar_one_or_none()
+        if role:
+            # Only cache committed rows; a role created below could still roll back.
+            with _default_role_lock:
+                AuthService._default_role_id = role.id
+        else:
+            role = Role(name=DEFAULT_ROLE)
             self.db.add(role)
             self.db.flush()
         return role
@@ -89,13 +147,13 @@ class AuthService:
     async def register(self, payload: RegisterIn, ip: str, user_agent: str) -> Tuple[User, TokenPair]:
         """Register a new user with default role."""
         try:
-            existing = self.db.execute(select(User).where(User.email == payload.email.lower())).scalar_one_or_none()
+            existing = self.db.execute(select(User).where(User.email == payload.email)).scalar_one_or_none()
             if existing:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
             user = User(
-                email=payload.email.lower(),
-                password_hash=hash_password(payload.password),
+                email=payload.email,
+                password_hash=await hash_password_async(payload.password, self.settings.bcrypt_rounds),
                 is_active=True,
             )
             user.roles.append(self._default_role())
@@ -108,14 +166,17 @@ class AuthService:
                 user_agent=user_agent,
                 device_fingerprint=None,
                 event="user.register",
+                roles=(DEFAULT_ROLE,),
             )
-            self.db.commit()
+            await self._commit()
             return user, token_pair
         except HTTPException:
             self.db.rollback()
             raise
         except (ValidationError, IntegrityError, ValueError) as exc:
             self.db.rollback()
+            if isinstance(exc, IntegrityError):
+                reset_default_role_cache()
             logger.exception("Registration validation error: {}", exc)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid registration request")
         except RefreshPersistenceError as exc:
@@ -129,14 +190,21 @@ class AuthService:
 
     async def login(self, payload: LoginIn, ip: str, user_agent: str) -> Tuple[User, TokenPair]:
         try:
-            user = self.db.execute(select(User).where(User.email == payload.email.lower())).scalar_one_or_none()
-            if not user or not verify_password(payload.password, user.password_hash):
-                self._record_login_attempt(payload.email, ip, user_agent, success=False)
+            user = (
+                self.db.execute(select(User).options(joinedload(User.roles)).where(User.email == payload.email))
+                .unique()
+                .scalar_one_or_none()
+            )
+            if not user or not await verify_password_async(payload.password, user.password_hash):
+                record_login_attempt(self.db, payload.email, ip, user_agent, success=False)
                 raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
             if not user.is_active:
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account disabled")
+            if needs_rehash(user.password_hash, self.settings.bcrypt_rounds):
+                # Upgrade to the configured cost while the plaintext is at hand; saved with the login commit.
+                user.password_hash = await hash_password_async(payload.password, self.settings.bcrypt_rounds)
 
-            self._record_login_attempt(payload.email, ip, user_agent, success=True)
+            record_login_attempt(self.db, payload.email, ip, user_agent, success=True)
 
             token_pair = await self._issue_tokens_with_persistence(
                 user=user,
@@ -144,8 +212,9 @@ class AuthService:
                 user_agent=user_agent,
                 device_fingerprint=payload.device_fingerprint,
                 event="user.login",
+                roles=self._role_names(user),
             )
-            self.db.commit()
+            await self._commit()
             return user, token_pair
         except HTTPException:
             self.db.rollback()
@@ -167,7 +236,7 @@ class AuthService:
         try:
             payload = decode_token(refresh_token, self.settings)
             ensure_token_type(payload, "refresh")
-        except JWTError:
+        except PyJWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
         jti = payload.get("jti")
@@ -175,57 +244,41 @@ class AuthService:
         if not jti or not user_id:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token invalid or revoked")
 
-        user = self.db.get(User, int(user_id))
+        # Load the user and roles in one round-trip; _role_names would otherwise lazy-load them.
+        user = (
+            self.db.execute(select(User).options(joinedload(User.roles)).where(User.id == int(user_id)))
+            .unique()
+            .scalar_one_or_none()
+        )
         if not user or not user.is_active:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token invalid or revoked")
-
-        redis_required = self.settings.refresh_persistence == "redis"
-        redis_client: Optional[Redis] = self._redis_override if redis_required else None
-        did_fallback = False
-
-        if redis_required:
-            if redis_client is None:
-                try:
-                    redis_client = await self._get_redis_client()
-                except Exception as exc:
-                    logger.warning("Redis validation unavailable for refresh {}: {}", jti, exc)
-                    if not self.settings.dev_relaxed_mode:
-                        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable") from exc
-                    did_fallback = True
-                    redis_client = None
-
-            if redis_client is None:
-                if not self.settings.dev_relaxed_mode:
-                    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable")
-                logger.warning("Redis client unavailable; continuing with DB lookup")
-            else:
-                try:
-                    cache_hit = await is_refresh_jti_valid(jti, client=redis_client)
-                    if cache_hit:
-                        logger.info("Refresh token {} validated via Redis cache", jti)
-                    else:
-                        logger.info("Refresh token {} cache miss; consulting database", jti)
-                except Exception as exc:
-                    logger.warning("Redis validation failure for refresh {}: {}", jti, exc)
-                    if not self.settings.dev_relaxed_mode:
-                        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable") from exc
-                    redis_client = None
-                    did_fallback = True
+        roles = self._role_names(user)
 
         try:
-            record = (
-                self.db.execute(select(RefreshToken).where(RefreshToken.jti == jti))
-                .scalars()
-                .one_or_none()
-            )
+            # Validate and revoke in one statement; a concurrent rotation of the
+            # same token matches zero rows instead of racing a separate SELECT.
+            # The database is the authority, so the Redis jti cache is not consulted.
+            now = utcnow()
+            revoked = self.db.execute(
+                update(RefreshToken)
+                .where(
+                    RefreshToken.jti == jti,
+                    RefreshToken.user_id == user.id,
+                    RefreshToken.revoked_at.is_(None),
+                    RefreshToken.expires_at > now,
+                )
+                .values(revoked_at=now)
+                .returning(RefreshToken.id)
+                .execution_options(synchronize_session=False)
+            ).first()
         except SQLAlchemyError as exc:
             self.db.rollback()
             logger.exception("Database lookup failed for refresh {}: {}", jti, exc)
             if self.settings.dev_relaxed_mode:
                 logger.warning("DEV relaxed mode active; issuing access token without rotation")
-                fallback = self._fallback_access_only(
+                fallback = await self._fallback_access_only(
                     user=user,
-                    roles=payload.get("roles") or self._role_names(user),
+                    roles=payload.get("roles") or roles,
                     ip=ip,
                     user_agent=user_agent,
                     event="user.refresh",
@@ -236,61 +289,48 @@ class AuthService:
                 return user, fallback
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable") from exc
 
-        now = _as_aware_utc(utcnow())
-        exp = _as_aware_utc(record.expires_at) if record else None
-        revoked_at = _as_aware_utc(record.revoked_at) if record else None
-
-        if (
-            record is None
-            or record.user_id != user.id
-            or revoked_at is not None
-            or exp is None
-            or exp <= now
-        ):
+        if revoked is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Refresh token invalid or revoked",
             )
 
-        old_jti = record.jti
-        roles = payload.get("roles") or self._role_names(user)
+        old_jti = jti
+        # Assessed once so a rotation that falls back does not repeat the device check.
+        susp = await self._assess_login(
+            "user.refresh", user.id, user.last_login_ip, user.last_login_ua, ip, user_agent
+        )
 
         try:
-            record.revoked_at = datetime.now(timezone.utc)
             new_pair = await self._issue_tokens_with_persistence(
                 user=user,
                 ip=ip,
                 user_agent=user_agent,
                 device_fingerprint=None,
                 event="user.refresh",
-                redis_client=redis_client,
+                replaces_jti=old_jti,
+                roles=roles,
+                issued_at=now,
+                susp=susp,
             )
 
-            if redis_required and redis_client:
-                try:
-                    await delete_refresh_jti(old_jti, client=redis_client)
-                except Exception as exc:
-                    logger.warning("Failed to delete cached refresh {}: {}", old_jti, exc)
-                    if not self.settings.dev_relaxed_mode:
-                        raise RefreshPersistenceError("Unable to delete cached refresh token") from exc
-                    did_fallback = True
-
-            self.db.commit()
-            if did_fallback and getattr(new_pair, "warning", None) is None:
+            await self._commit()
+            if self.refresh_cache.degraded and getattr(new_pair, "warning", None) is None:
                 new_pair.warning = FALLBACK_REFRESH_WARNING
             return user, new_pair
         except RefreshPersistenceError as exc:
             self.db.rollback()
             if self.settings.dev_relaxed_mode:
                 logger.warning("DEV relaxed rotation fallback for {}: {}", old_jti, exc)
-                fallback = self._fallback_access_only(
+                fallback = await self._fallback_access_only(
                     user=user,
-                    roles=roles,
+                    roles=payload.get("roles") or roles,
                     ip=ip,
                     user_agent=user_agent,
                     event="user.refresh",
                     refresh_token=refresh_token,
                     refresh_expires_at=payload.get("exp"),
+                    susp=susp,
                 )
                 self.db.commit()
                 return user, fallback
@@ -300,30 +340,24 @@ class AuthService:
             logger.exception("Unexpected refresh rotation error: {}", exc)
             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable")
 
-    async def logout(self, refresh_token: str, user: User) -> None:
+    async def logout(
+        self,
+        refresh_token: str,
+        user: User,
+        ip: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> None:
         try:
             payload = decode_token(refresh_token, self.settings)
             ensure_token_type(payload, "refresh")
-        except JWTError:
+        except PyJWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
         jti = payload.get("jti")
         if not jti:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-        redis_required = self.settings.refresh_persistence == "redis"
-        redis_client: Optional[Redis] = self._redis_override if redis_required else None
-        if redis_required:
-            try:
-                redis_client = await self._get_redis_client()
-            except Exception as exc:
-                logger.warning("Redis unavailable during logout: {}", exc)
-                if not self.settings.dev_relaxed_mode:
-                    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable") from exc
-                redis_client = None
-            if redis_client is None and not self.settings.dev_relaxed_mode:
-                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable")
-
+        now = utcnow()
         record = (
             self.db.execute(select(RefreshToken).where(RefreshToken.jti == jti))
             .scalars()
@@ -331,38 +365,41 @@ class AuthService:
         )
 
         if record:
-            record.revoked_at = datetime.now(timezone.utc)
+            record.revoked_at = now
 
-        if redis_required and redis_client is not None:
-            try:
-                await delete_refresh_jti(jti, client=redis_client)
-            except Exception as exc:
-                logger.warning("Failed to delete refresh cache during logout: {}", exc)
-                if not self.settings.dev_relaxed_mode:
-                    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable") from exc
+        try:
+            await self.refresh_cache.delete(jti)
+        except RefreshPersistenceError as exc:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service unavailable") from exc
 
-        session = (
-            self.db.execute(
-                select(SessionModel)
-                .where(SessionModel.user_id == user.id)
-                .order_by(SessionModel.created_at.desc())
-            )
-            .scalars()
-            .first()
+        latest_session = (
+            select(SessionModel.id)
+            .where(SessionModel.user_id == user.id, SessionModel.active.is_(True))
+            .order_by(SessionModel.created_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        self.db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == latest_session)
+            .values(active=False, last_seen_at=now)
+            .execution_options(synchronize_session=False)
         )
-        if session:
-            session.active = False
-            session.last_seen_at = utcnow()
-
-        record_event(self.db, self.settings, "user.logout", user, None, None, metadata=None)
-        self.db.commit()
 
-    def _record_login_attempt(self, email: str, ip: str, user_agent: str, success: bool) -> None:
-        attempt = LoginAttempt(email=email, ip=ip, user_agent=user_agent, success=success)
-        self.db.add(attempt)
+        record_event(
+            self.db,
+            self.settings,
+            "user.logout",
+            user,
+            ip,
+            user_agent,
+            metadata=None,
+            deferred=self.settings.audit_stream_enabled,
+        )
+        await self._commit()
 
-    def _role_names(self, user: User) -> Sequence[str]:
-        return [role.name for role in user.roles]
+    def _role_names(self, user: User) -> Tuple[str, ...]:
+        return tuple(role.name for role in user.roles)
 
     async def _issue_tokens_with_persistence(
         self,
@@ -371,37 +408,45 @@ class AuthService:
         user_agent: Optional[str],
         device_fingerprint: Optional[str],
         event: str,
-        redis_client: Optional[Redis] = None,
+        replaces_jti: Optional[str] = None,
+        roles: Optional[Sequence[str]] = None,
+        issued_at: Optional[datetime] = None,
+        susp: Optional[SuspiciousLoginResult] = None,
     ) -> TokenPair:
-        roles = self._role_names(user)
-        token_result = generate_token_pair(user.id, roles, self.settings)
-        issued_at = now_utc()
-
-        refresh_record = RefreshToken(
-            user_id=user.id,
-            jti=token_result.refresh_jti,
-            issued_at=issued_at,
-            expires_at=token_result.refresh_expires_at,
-            revoked_at=None,
-            ip=ip,
-            user_agent=user_agent,
-        )
+        if roles is None:
+            roles = self._role_names(user)
+        issued_at = issued_at or utcnow()
+        token_result = generate_token_pair(user.id, roles, self.settings, issued_at)
 
-        session_fp = fingerprint(ip or "unknown", user_agent or "unknown", device_fingerprint)
-        session_entry = SessionModel(
-            user_id=user.id,
-            created_at=issued_at,
-            last_seen_at=issued_at,
-            ip=ip,
-            user_agent=user_agent,
-            device_fingerprint=session_fp,
-            active=True,
-        )
+        session_fp = fingerprint(ip, user_agent, device_fingerprint)
 
+        # Core INSERTs skip building ORM instances and a unit-of-work flush for
+        # rows this request never reads back.
         try:
-            self.db.add(refresh_record)
-            self.db.add(session_entry)
-            self.db.flush()
+            self.db.execute(
+                insert(RefreshToken).values(
+                    user_id=user.id,
+                    jti=token_result.refresh_jti,
+                    issued_at=issued_at,
+                    expires_at=token_result.refresh_expires_at,
+                    revoked_at=None,
+                    ip=ip,
+                    user_agent=user_agent,
+                )
+            )
+            session_id = self.db.execute(
+                insert(SessionModel)
+                .values(
+                    user_id=user.id,
+                    created_at=issued_at,
+                    last_seen_at=issued_at,
+                    ip=ip,
+                    user_agent=user_agent,
+                    device_fingerprint=session_fp,
+                    active=True,
+                )
+                .returning(SessionModel.id)
+            ).scalar_one()
         except SQLAlchemyError as exc:
             raise RefreshPersistenceError("Failed to persist refresh token to database") from exc
 
@@ -411,45 +456,19 @@ class AuthService:
         user.last_login_ip = ip
         user.last_login_ua = user_agent
 
-        susp = suspicious_login_check(prev_ip, prev_ua, ip, user_agent)
+        if susp is None:
+            susp = await self._assess_login(event, user.id, prev_ip, prev_ua, ip, user_agent)
         metadata = {
             "roles": roles,
-            "session_id": session_entry.id,
+            "session_id": session_id,
             "refresh_jti": token_result.refresh_jti,
             "severity": susp.severity,
             "reason": susp.reason,
             "fallback": False,
         }
 
-        redis_required = self.settings.refresh_persistence == "redis"
-        active_redis = redis_client if redis_required else None
-
-        if redis_required:
-            if active_redis is None:
-                try:
-                    active_redis = await self._get_redis_client()
-                except Exception as exc:
-                    logger.warning("Redis persistence lookup failed: {}", exc)
-                    active_redis = None
-                if active_redis is None:
-                    if not self.settings.dev_relaxed_mode:
-                        raise RefreshPersistenceError("Redis persistence required but unavailable")
-                    logger.warning("Redis persistence unavailable; continuing with DB-only storage")
-
-        if active_redis is not None:
-            ttl_seconds = max(int((token_result.refresh_expires_at - issued_at).total_seconds()), 1)
-            try:
-                await cache_refresh_jti(
-                    token_result.refresh_jti,
-                    user.id,
-                    ttl_seconds,
-                    client=active_redis,
-                )
-            except Exception as exc:
-                logger.warning("Failed to cache refresh token {}: {}", token_result.refresh_jti, exc)
-                if not self.settings.dev_relaxed_mode:
-                    raise RefreshPersistenceError("Redis persistence failed") from exc
-            redis_client = active_redis
+        ttl_seconds = max(int((token_result.refresh_expires_at - issued_at).total_seconds()), 1)
+        await self.refresh_cache.store(token_result.refresh_jti, user.id, ttl_seconds, replaces_jti=replaces_jti)
 
         record_event(
             self.db,
@@ -460,16 +479,18 @@ class AuthService:
             user_agent,
             metadata=metadata,
             alert_service=self.alert_service,
+            deferred=self.settings.audit_stream_enabled,
         )
 
-        return TokenPair(
+        # Every field is built here from trusted values, so skip validation.
+        return TokenPair.construct(
             access_token=token_result.access_token,
             refresh_token=token_result.refresh_token,
             expires_in=max(1, int((token_result.access_expires_at - issued_at).total_seconds())),
             refresh_expires_in=max(1, int((token_result.refresh_expires_at - issued_at).total_seconds())),
         )
 
-    def _fallback_access_only(
+    async def _fallback_access_only(
         self,
         user: User,
         roles: Sequence[str],
@@ -478,19 +499,19 @@ class AuthService:
         event: str,
         refresh_token: Optional[str] = "",
         refresh_expires_at: Optional[int] = None,
+        susp: Optional[SuspiciousLoginResult] = None,
     ) -> TokenPair:
         issued_at = utcnow()
-        access_token = jwt.encode(
+        access_token = encode_token(
             {
                 "sub": str(user.id),
                 "roles": list(roles),
-                "jti": str(uuid4()),
+                "jti": secrets.token_hex(16),
                 "type": "access",
                 "iat": int(issued_at.timestamp()),
                 "exp": int((issued_at + timedelta(minutes=FALLBACK_ACCESS_TTL_MINUTES)).timestamp()),
             },
-            self.settings.secret_key,
-            algorithm=ALGORITHM,
+            self.settings,
         )
 
         prev_ip = user.last_login_ip
@@ -499,7 +520,8 @@ class AuthService:
         user.last_login_ip = ip
         user.last_login_ua = user_agent
 
-        susp = suspicious_login_check(prev_ip, prev_ua, ip, user_agent)
+        if susp is None:
+            susp = await self._assess_login(event, user.id, prev_ip, prev_ua, ip, user_agent)
         metadata = {
             "roles": list(roles),
             "session_id": None,
@@ -524,7 +546,7 @@ class AuthService:
         if refresh_token and refresh_expires_at:
             refresh_expires_in = max(0, refresh_expires_at - int(issued_at.timestamp()))
 
-        return TokenPair(
+        return TokenPair.construct(
             access_token=access_token,
             refresh_token=refresh_token or "",
             expires_in=FALLBACK_ACCESS_TTL_MINUTES * 60,
@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import re
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseSettings, EmailStr, Field, validator
 
+# A user part, then "local" or a dotted domain with no empty labels.
+_SEED_ADMIN_EMAIL_RE = re.compile(r"[^@\s]+@(?:local|[^@\s.]+(?:\.[^@\s.]+)+)")
+
 
 class Settings(BaseSettings):
     """Settings pulled from environment variables or `.env` files."""
@@ -19,6 +23,10 @@ class Settings(BaseSettings):
     secret_key: str = Field(..., env="SECRET_KEY")
     access_token_ttl_min: int = Field(15, env="ACCESS_TOKEN_TTL_MIN")
     refresh_token_ttl_days: int = Field(7, env="REFRESH_TOKEN_TTL_DAYS")
+    bcrypt_rounds: int = Field(12, env="BCRYPT_ROUNDS")
+    jwt_algorithm: str = Field("HS256", env="JWT_ALGORITHM")
+    jwt_private_key_path: Optional[str] = Field(None, env="JWT_PRIVATE_KEY_PATH")
+    jwt_public_key_path: Optional[str] = Field(None, env="JWT_PUBLIC_KEY_PATH")
 
     db_url: str = Field(..., env="DB_URL")
     redis_url: str = Field(..., env="REDIS_URL")
@@ -35,6 +43,9 @@ class Settings(BaseSettings):
     smtp_from: Optional[EmailStr] = Field(None, env="SMTP_FROM")
     smtp_to: Optional[EmailStr] = Field(None, env="SMTP_TO")
 
+    audit_retention_days: int = Field(90, env="AUDIT_RETENTION_DAYS")
+    audit_stream_enabled: bool = Field(False, env="AUDIT_STREAM_ENABLED")
+
     seed_admin_email: Optional[str] = Field(None, env="SEED_ADMIN_EMAIL")
     dev_relaxed_mode: bool = Field(True, env="DEV_RELAXED_MODE")
     refresh_persistence: str = Field("db", env="REFRESH_PERSISTENCE")
@@ -68,6 +79,25 @@ class Settings(BaseSettings):
             raise ValueError("SECRET_KEY must be at least 16 characters long.")
         return value
 
+    @validator("jwt_algorithm", pre=True, always=True)
+    def validate_jwt_algorithm(cls, value: Optional[str]) -> str:
+        if not value:
+            return "HS256"
+        normalized = value.strip()
+        if normalized.lower() == "eddsa":
+            return "EdDSA"
+        normalized = normalized.upper()
+        if normalized not in {"HS256", "RS256", "ES256"}:
+            raise ValueError("JWT_ALGORITHM must be one of HS256, RS256, ES256 or EdDSA.")
+        return normalized
+
+    @validator("jwt_private_key_path", "jwt_public_key_path", always=True)
+    def require_jwt_key_paths(cls, value: Optional[str], values: Dict[str, Any], field: Any) -> Optional[str]:
+        algorithm = values.get("jwt_algorithm", "HS256")
+        if algorithm != "HS256" and not value:
+            raise ValueError(f"{field.name.upper()} is required when JWT_ALGORITHM is {algorithm}.")
+        return value
+
     @validator("dev_relaxed_mode", pre=True, always=True)
     def determine_relaxed_mode(cls, value: Optional[bool], values: Dict[str, Any]) -> bool:
         app_env = str(values.get("app_env", "dev")).lower()
@@ -90,15 +120,8 @@ class Settings(BaseSettings):
         trimmed = value.strip().lower()
         if not trimmed:
             return None
-        if "@" not in trimmed:
-            raise ValueError("SEED_ADMIN_EMAIL must contain '@'.")
-        user, domain = trimmed.split("@", 1)
-        if not user or not domain:
-            raise ValueError("SEED_ADMIN_EMAIL must include both user and domain parts.")
-        if domain == "local":
-            return trimmed
-        if "." not in domain or domain.startswith(".") or domain.endswith("."):
-            raise ValueError("SEED_ADMIN_EMAIL domain must contain a dot and not start/end with '.'.")
+        if not _SEED_ADMIN_EMAIL_RE.fullmatch(trimmed):
+            raise ValueError("SEED_ADMIN_EMAIL must look like user@example.com (or user@local).")
         return trimmed
 
     @validator("refresh_persistence", pre=True, always=True)
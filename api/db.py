@@ -3,14 +3,16 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
-from typing import Generator, Optional
+from typing import Any, Dict, Generator, Optional
 
+import orjson
 from alembic import command
 from alembic.config import Config as AlembicConfig
 from loguru import logger
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from .config import Settings
 
@@ -20,19 +22,38 @@ _engine: Optional[Engine] = None
 _SessionLocal: Optional[sessionmaker] = None
 
 
+def _json_dumps(value: Any) -> str:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:"
+
+
 def get_engine(settings: Settings) -> Engine:
     """Return a singleton SQLAlchemy engine."""
     global _engine
     if _engine is None:
         connect_args = {}
+        engine_args: Dict[str, Any] = {}
         if settings.db_url.startswith("sqlite"):
             connect_args["check_same_thread"] = False
+            if _is_sqlite_memory(settings.db_url):
+                # One shared connection, or each pooled connection would get its own empty database.
+                engine_args["poolclass"] = StaticPool
         _engine = create_engine(
             settings.db_url,
             echo=False,
             future=True,
             pool_pre_ping=True,
+            # Room for every distinct statement shape so hot paths never recompile.
+            query_cache_size=1200,
+            # JSON columns (audit metadata) go through orjson instead of the stdlib encoder.
+            json_serializer=_json_dumps,
+            json_deserializer=orjson.loads,
             connect_args=connect_args,
+            **engine_args,
         )
         logger.debug("Database engine initialised for {}", settings.db_url)
     return _engine
@@ -14,8 +14,8 @@ from .db import get_session_factory
 from .models import User
 from .ratelimit import rate_limit_or_raise
 from .redis_client import get_redis_client_by_url
-from .security import decode_token, ensure_token_type
-from .utils.ip import client_ip
+from .security import decode_token_cached, ensure_token_type
+from .users.cache import get_user_cached
 from loguru import logger
 
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -60,14 +60,14 @@ async def get_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Auth required")
     token = credentials.credentials
     try:
-        payload = decode_token(token, settings)
+        payload = decode_token_cached(token, settings)
         ensure_token_type(payload, "access")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token subject")
-    user: Optional[User] = db.get(User, int(user_id))
+    user = get_user_cached(db, settings, int(user_id))
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     return user
@@ -75,11 +75,14 @@ async def get_current_user(
 
 def require_roles(*roles: str) -> Callable[[User], User]:
     """Dependency ensuring the current user has all specified roles."""
-
-    def _checker(user: User = Depends(get_current_user)) -> User:
-        names = {role.name for role in user.roles}
-        missing = [role for role in roles if role not in names]
-        if missing:
+    required = frozenset(roles)
+
+    # Async so FastAPI runs the check inline instead of hopping to the threadpool;
+    # roles are already loaded by get_current_user.
+    async def _checker(user: User = Depends(get_current_user)) -> User:
+        names = user.role_names
+        if not required <= names:
+            missing = [role for role in roles if role not in names]
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Missing required roles: {', '.join(missing)}",
@@ -91,10 +94,10 @@ def require_roles(*roles: str) -> Callable[[User], User]:
 
 def require_any_role(*roles: str) -> Callable[[User], User]:
     """Dependency ensuring the user has at least one of the specified roles."""
+    allowed = frozenset(roles)
 
-    def _checker(user: User = Depends(get_current_user)) -> User:
-        names = {role.name for role in user.roles}
-        if not names.intersection(roles):
+    async def _checker(user: User = Depends(get_current_user)) -> User:
+        if allowed.isdisjoint(user.role_names):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient role privileges",
@@ -117,8 +120,8 @@ def rate_limit_dependency(
         redis: Optional[Redis] = Depends(get_redis),
         settings: Settings = Depends(get_settings),
     ) -> None:
-        ip = client_ip(request)
-        key = f"rl:{bucket}:{ip}"
+        ip = request.state.ip
+        key = f"rlg:{bucket}:{ip}"
         await rate_limit_or_raise(settings, redis, key, capacity, period_seconds, detail)
 
     return _rate_limit
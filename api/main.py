@@ -2,16 +2,52 @@
 
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 import anyio
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
-from .config import get_settings
+from .alerts.service import alert_worker, close_alert_service
+from .audit.service import purge_expired_events
+from .audit.stream import audit_consumer
+from .auth.attempts import login_attempt_writer
+from .config import Settings, get_settings
 from .db import init_db
 from .redis_client import close_all_cached_clients, get_redis_client_by_url
+from .responses import UTCJSONResponse
+from .utils.ip import ClientContextMiddleware
+
+AUDIT_RETENTION_INTERVAL_SECONDS = 24 * 60 * 60
+AUDIT_RETENTION_INITIAL_DELAY_SECONDS = 5 * 60
+AUDIT_RETENTION_LOCK_KEY = "audit:retention:lock"
+
+
+async def _claim_retention_run(settings: Settings) -> bool:
+    """Let one process per interval purge; without Redis every process may."""
+    try:
+        redis = await get_redis_client_by_url(settings.redis_url)
+    except Exception:
+        redis = None
+    if redis is None:
+        return True
+    # The key is never released: it expires just before the next run is due.
+    ttl = AUDIT_RETENTION_INTERVAL_SECONDS - 60
+    return bool(await redis.set(AUDIT_RETENTION_LOCK_KEY, "1", nx=True, ex=ttl))
+
+
+async def _audit_retention_loop(settings: Settings) -> None:
+    """Purge expired audit events once a day for the lifetime of the app."""
+    await asyncio.sleep(AUDIT_RETENTION_INITIAL_DELAY_SECONDS)
+    while True:
+        try:
+            if await _claim_retention_run(settings):
+                await anyio.to_thread.run_sync(purge_expired_events, settings)
+        except Exception as exc:  # pragma: no cover - best effort housekeeping
+            logger.warning("Audit retention purge failed: {}", exc)
+        await asyncio.sleep(AUDIT_RETENTION_INTERVAL_SECONDS)
 
 
 @asynccontextmanager
@@ -41,15 +77,28 @@ async def lifespan(app: FastAPI):
         else:
             logger.error(message)
             raise HTTPException(status_code=503, detail="Redis unavailable")
+    background_tasks = [
+        asyncio.create_task(_audit_retention_loop(settings)),
+        asyncio.create_task(alert_worker()),
+        asyncio.create_task(login_attempt_writer(settings)),
+    ]
+    if settings.audit_stream_enabled and redis is not None:
+        background_tasks.append(asyncio.create_task(audit_consumer(settings, redis)))
     try:
         yield
     finally:
+        for task in background_tasks:
+            task.cancel()
+        for task in background_tasks:
+            with suppress(asyncio.CancelledError):
+                await task
         if redis:
             try:
                 await redis.aclose()
             except Exception:
                 pass
         await close_all_cached_clients()
+        await close_alert_service()
         logger.info("SentinelAuth shutdown complete")
 
 
@@ -70,8 +119,11 @@ def create_app() -> FastAPI:
         version="0.1.0",
         openapi_tags=tags_metadata,
         lifespan=lifespan,
+        default_response_class=UTCJSONResponse,
     )
 
+    app.add_middleware(ClientContextMiddleware)
+
     if settings.cors_origins:
         app.add_middleware(
             CORSMiddleware,
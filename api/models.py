@@ -10,6 +10,7 @@ from sqlalchemy import (
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
@@ -46,10 +47,16 @@ class User(Base, TimestampMixin):
     last_login_ip = Column(String(64), nullable=True)
     last_login_ua = Column(String(512), nullable=True)
 
-    roles = relationship("Role", secondary="user_roles", back_populates="users")
+    # Roles are needed on nearly every load (tokens, RBAC, user listings).
+    roles = relationship("Role", secondary="user_roles", back_populates="users", lazy="selectin")
     sessions = relationship("Session", back_populates="user")
     refresh_tokens = relationship("RefreshToken", back_populates="user")
 
+    @property
+    def role_names(self) -> frozenset[str]:
+        """Names of the user's roles, for set-based permission checks."""
+        return frozenset(role.name for role in self.roles)
+
 
 class Role(Base):
     """Role definition."""
@@ -105,6 +112,15 @@ class Session(Base):
 
     user = relationship("User", back_populates="sessions")
 
+    __table_args__ = (
+        Index(
+            "ix_sessions_user_created",
+            "user_id",
+            created_at.desc(),
+            postgresql_include=["id", "last_seen_at", "ip", "user_agent", "device_fingerprint", "active"],
+        ),
+    )
+
 
 class AuditEvent(Base):
     """Audit trail for sensitive events."""
@@ -113,14 +129,23 @@ class AuditEvent(Base):
 
     id = Column(Integer, primary_key=True)
     ts = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
-    event_type = Column(String(128), nullable=False, index=True)
+    # Indexed through the composite indexes below, which lead with these columns.
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    event_type = Column(String(128), nullable=False)
     ip = Column(String(64), nullable=True)
     user_agent = Column(String(512), nullable=True)
     meta = Column("metadata", JSON, nullable=True)
+    event_key = Column(String(32), nullable=True)
 
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_audit_events_user_event_ts", "user_id", "event_type", ts.desc(), postgresql_using="btree"),
+        Index("ix_audit_events_ts", ts.desc(), postgresql_using="btree"),
+        Index("ix_audit_events_type_ts", "event_type", ts.desc(), postgresql_using="btree"),
+        Index("ux_audit_events_event_key", "event_key", unique=True),
+    )
+
 
 class LoginAttempt(Base):
     """Login attempt history for anomaly detection."""
@@ -129,11 +154,13 @@ class LoginAttempt(Base):
 
     id = Column(Integer, primary_key=True)
     ts = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
-    email = Column(String(255), nullable=False, index=True)
+    email = Column(String(255), nullable=False)
     ip = Column(String(64), nullable=True)
     user_agent = Column(String(512), nullable=True)
     success = Column(Boolean, default=False, nullable=False)
 
+    __table_args__ = (Index("ix_login_attempts_email_ts", "email", ts.desc(), postgresql_using="btree"),)
+
 
 def user_role_names(user: Optional[User]) -> list[str]:
     """Return the role names for a user."""
@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import hashlib
 import time
-from typing import Dict, Tuple
+import uuid
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
 
 from fastapi import HTTPException, status
 from loguru import logger
 from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
 
 from .config import Settings
 from .redis_client import get_redis_client_by_url
@@ -32,42 +35,82 @@ def _mem_limit(key: str, limit: int, window_s: int) -> bool:
     return count > limit
 
 
+def _mem_limit_many(rules: Sequence["RateLimitRule"]) -> Optional["RateLimitRule"]:
+    """Return the first exhausted rule, consuming from no bucket unless all have room."""
+    now = _mem_now()
+    for rule in rules:
+        count, window_end = _MEM_STORE.get(rule.key, (0, 0.0))
+        if now <= window_end and count >= rule.capacity:
+            return rule
+    for rule in rules:
+        _mem_limit(rule.key, rule.capacity, rule.period_seconds)
+    return None
+
+
 def reset_memory_rate_limiter() -> None:
     _MEM_STORE.clear()
 
 
+# GCRA: the bucket is a single integer, the theoretical arrival time (TAT) in
+# microseconds, stored in a plain string key. ARGV: capacity, emission interval
+# (period / capacity) in microseconds, now in microseconds. Returns
+# {allowed, whole tokens left}. The key expires once the TAT passes, at which
+# point the bucket is full again and needs no state.
 RATE_LIMIT_LUA = """
 local key = KEYS[1]
 local capacity = tonumber(ARGV[1])
-local refill_rate = tonumber(ARGV[2])
+local interval = tonumber(ARGV[2])
 local now = tonumber(ARGV[3])
-local ttl = tonumber(ARGV[4])
-
-local data = redis.call("HMGET", key, "tokens", "timestamp")
-local tokens = tonumber(data[1])
-local timestamp = tonumber(data[2])
-
-if tokens == nil then
-    tokens = capacity
-    timestamp = now
-else
-    local delta = now - timestamp
-    local refill = delta * refill_rate
-    tokens = math.min(capacity, tokens + refill)
+local burst = capacity * interval
+
+local tat = tonumber(redis.call("GET", key)) or now
+local new_tat = math.max(tat, now) + interval
+if new_tat - burst > now then
+    return {0, 0}
+end
+
+redis.call("SET", key, string.format("%d", new_tat), "PX", math.ceil((new_tat - now) / 1000))
+return {1, math.floor((burst - (new_tat - now)) / interval)}
+"""
+
+RATE_LIMIT_SHA = hashlib.sha1(RATE_LIMIT_LUA.encode("utf-8")).hexdigest()
+
+
+# Sliding-window check over N (key, capacity, period) buckets in one atomic call.
+# ARGV: now, member, then capacity/period pairs in KEYS order. Returns the
+# 1-based index of the first exhausted bucket, or 0 when all buckets admit.
+MULTI_RATE_LIMIT_LUA = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[1 + i * 2])
+    local period = tonumber(ARGV[2 + i * 2])
+    redis.call("ZREMRANGEBYSCORE", key, "-inf", now - period)
+    if redis.call("ZCARD", key) >= capacity then
+        return i
+    end
 end
 
-if tokens < 1 then
-    redis.call("HMSET", key, "tokens", tokens, "timestamp", now)
-    redis.call("EXPIRE", key, ttl)
-    return {0, tokens}
-else
-    tokens = tokens - 1
-    redis.call("HMSET", key, "tokens", tokens, "timestamp", now)
-    redis.call("EXPIRE", key, ttl)
-    return {1, tokens}
+for i, key in ipairs(KEYS) do
+    local period = tonumber(ARGV[2 + i * 2])
+    redis.call("ZADD", key, now, member)
+    redis.call("PEXPIRE", key, math.ceil(period * 1000))
 end
+return 0
 """
 
+MULTI_RATE_LIMIT_SHA = hashlib.sha1(MULTI_RATE_LIMIT_LUA.encode("utf-8")).hexdigest()
+
+
+class RateLimitRule(NamedTuple):
+    """One bucket checked by :func:`rate_limit_many_or_raise`."""
+
+    key: str
+    capacity: int
+    period_seconds: int
+    detail: str
+
 
 class RateLimitExceeded(HTTPException):
     """Exception representing a rate limit breach."""
@@ -83,12 +126,16 @@ async def consume_token(
     period_seconds: int,
 ) -> Tuple[bool, float]:
     """Consume a token from the bucket. Returns success flag and remaining tokens."""
-    now = time.time()
-    refill_rate = capacity / period_seconds
-    ttl = max(period_seconds * 2, 1)
+    # Integer microseconds keep the script's arithmetic exact.
+    now_us = time.time_ns() // 1000
+    interval_us = max(period_seconds * 1_000_000 // capacity, 1)
     keys = [key]
-    args = [str(capacity), f"{refill_rate}", f"{now}", str(ttl)]
-    response = await redis.eval(RATE_LIMIT_LUA, len(keys), *keys, *args)
+    args = [str(capacity), str(interval_us), str(now_us)]
+    try:
+        response = await redis.evalsha(RATE_LIMIT_SHA, len(keys), *keys, *args)
+    except NoScriptError:
+        await redis.script_load(RATE_LIMIT_LUA)
+        response = await redis.evalsha(RATE_LIMIT_SHA, len(keys), *keys, *args)
     success = int(response[0])
     remaining = float(response[1])
     return bool(success), remaining
@@ -112,17 +159,58 @@ async def rate_limit_or_raise(
     if redis is not None:
         try:
             ok, remaining = await consume_token(redis, key, capacity, period_seconds)
+        except Exception as exc:
+            logger.warning("Rate limiter redis error for key {}: {}", key, exc)
+        else:
             if not ok:
                 logger.warning("Rate limit hit for key={} remaining={}", key, remaining)
                 raise RateLimitExceeded(detail=detail)
             return
-        except Exception as exc:
-            logger.warning("Rate limiter redis error for key {}: {}", key, exc)
 
     if _mem_limit(key, capacity, period_seconds):
         logger.warning("Rate limit hit (memory fallback) for key={}", key)
         raise RateLimitExceeded(detail=detail)
 
 
+async def consume_many(redis: Redis, rules: Sequence[RateLimitRule]) -> int:
+    """Check every bucket in a single round-trip; return the 1-based index hit, or 0."""
+    keys = [rule.key for rule in rules]
+    args = [f"{time.time()}", uuid.uuid4().hex]
+    for rule in rules:
+        args.extend((str(rule.capacity), str(rule.period_seconds)))
+    try:
+        response = await redis.evalsha(MULTI_RATE_LIMIT_SHA, len(keys), *keys, *args)
+    except NoScriptError:
+        await redis.script_load(MULTI_RATE_LIMIT_LUA)
+        response = await redis.evalsha(MULTI_RATE_LIMIT_SHA, len(keys), *keys, *args)
+    return int(response)
+
 
+async def rate_limit_many_or_raise(
+    settings: Settings,
+    redis: Redis | None,
+    rules: Sequence[RateLimitRule],
+) -> None:
+    """Enforce several rate limits atomically, raising HTTP 429 for the first breach."""
+    if redis is None:
+        try:
+            redis = await get_redis_client_by_url(settings.redis_url)
+        except Exception as exc:
+            logger.warning("Rate limiter redis lookup failed for {}: {}", rules[0].key, exc)
+            redis = None
+    if redis is not None:
+        try:
+            hit = await consume_many(redis, rules)
+        except Exception as exc:
+            logger.warning("Rate limiter redis error for keys {}: {}", [rule.key for rule in rules], exc)
+        else:
+            if hit:
+                rule = rules[hit - 1]
+                logger.warning("Rate limit hit for key={}", rule.key)
+                raise RateLimitExceeded(detail=rule.detail)
+            return
 
+    rule = _mem_limit_many(rules)
+    if rule is not None:
+        logger.warning("Rate limit hit (memory fallback) for key={}", rule.key)
+        raise RateLimitExceeded(detail=rule.detail)
@@ -1,3 +1,4 @@
+import hashlib
 from typing import Dict, Optional
 
 from redis import asyncio as aioredis
@@ -5,6 +6,11 @@ from redis import asyncio as aioredis
 _clients: Dict[str, aioredis.Redis] = {}
 _last_url: Optional[str] = None
 
+KNOWN_DEVICE_TTL_SECONDS = 30 * 24 * 60 * 60
+HEALTH_CHECK_INTERVAL_SECONDS = 30
+POOL_MAX_CONNECTIONS = 50
+POOL_TIMEOUT_SECONDS = 5
+
 
 async def _safe_close(client: aioredis.Redis) -> None:
     try:
@@ -20,16 +26,24 @@ async def get_redis_client_by_url(url: str) -> Optional[aioredis.Redis]:
     global _last_url
     _last_url = url
 
+    # Cached clients are returned without a PING: the pool reconnects broken
+    # connections on the next command and health-checks idle ones itself.
     client = _clients.get(url)
     if client is not None:
-        try:
-            await client.ping()
-            return client
-        except Exception:
-            await _safe_close(client)
-            _clients.pop(url, None)
-
-    client = aioredis.from_url(url, encoding="utf-8", decode_responses=True)
+        return client
+
+    # A bounded pool that makes callers wait for a free connection instead of
+    # opening sockets without limit (or failing) during bursts.
+    pool = aioredis.BlockingConnectionPool.from_url(
+        url,
+        max_connections=POOL_MAX_CONNECTIONS,
+        timeout=POOL_TIMEOUT_SECONDS,
+        encoding="utf-8",
+        decode_responses=True,
+        health_check_interval=HEALTH_CHECK_INTERVAL_SECONDS,
+        socket_keepalive=True,
+    )
+    client = aioredis.Redis.from_pool(pool)
     try:
         await client.ping()
     except Exception:
@@ -81,6 +95,54 @@ async def delete_refresh_jti(
     await client.delete(f"refresh:{jti}")
 
 
+async def rotate_refresh_jti(
+    old_jti: str,
+    new_jti: str,
+    user_id: int,
+    ttl_seconds: int,
+    url: Optional[str] = None,
+    client: Optional[aioredis.Redis] = None,
+) -> None:
+    """Cache the new refresh jti and drop the old one in a single round-trip."""
+    client = await _ensure_client(url, client)
+    pipe = client.pipeline(transaction=False)
+    pipe.setex(f"refresh:{new_jti}", ttl_seconds, str(user_id))
+    pipe.delete(f"refresh:{old_jti}")
+    await pipe.execute()
+
+
+def _device_member(ip: Optional[str], user_agent: Optional[str]) -> str:
+    return hashlib.sha1(f"{ip or ''}|{user_agent or ''}".encode("utf-8")).hexdigest()[:16]
+
+
+async def is_known_device(
+    user_id: int,
+    ip: Optional[str],
+    user_agent: Optional[str],
+    url: Optional[str] = None,
+    client: Optional[aioredis.Redis] = None,
+) -> bool:
+    """Exact membership test against the user's recently seen (ip, user agent) pairs."""
+    client = await _ensure_client(url, client)
+    return bool(await client.sismember(f"known_devices:{user_id}", _device_member(ip, user_agent)))
+
+
+async def remember_device(
+    user_id: int,
+    ip: Optional[str],
+    user_agent: Optional[str],
+    url: Optional[str] = None,
+    client: Optional[aioredis.Redis] = None,
+) -> None:
+    """Record a device for the user; the set expires after a month without logins."""
+    client = await _ensure_client(url, client)
+    key = f"known_devices:{user_id}"
+    pipe = client.pipeline(transaction=False)
+    pipe.sadd(key, _device_member(ip, user_agent))
+    pipe.expire(key, KNOWN_DEVICE_TTL_SECONDS)
+    await pipe.execute()
+
+
 async def close_cached_client(url: str) -> None:
     client = _clients.pop(url, None)
     if client:
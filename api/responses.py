@@ -0,0 +1,15 @@
+"""Response classes shared by the API routers."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+class UTCJSONResponse(ORJSONResponse):
+    """orjson rendering with UTC timestamps (naive DB values are UTC) as ``Z``."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
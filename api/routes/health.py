@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import time
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+import anyio
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response
 from loguru import logger
 
 from ..config import Settings, get_settings
@@ -14,33 +18,76 @@ from ..schemas import HealthResponse
 
 router = APIRouter()
 
+# The healthy response never varies, so it is rendered once instead of per probe.
+_OK_BODY = orjson.dumps(HealthResponse(status="ok", db_ok=True, redis_ok=True).dict())
+
+# Probe results are reused this long so that probe storms cost one DB and one Redis check.
+PROBE_CACHE_SECONDS = 0.5
+_last_probe: Optional[Tuple[float, Tuple[bool, bool]]] = None
+_probe_in_flight: "Optional[asyncio.Future[Tuple[bool, bool]]]" = None
 
-@router.get("", response_model=HealthResponse, summary="Service health status")
-async def health(settings: Settings = Depends(get_settings)) -> HealthResponse:
-    warnings: List[str] = []
 
-    db_ok = True
+def _check_db(settings: Settings) -> None:
+    engine = get_engine(settings)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+async def _db_probe(settings: Settings) -> bool:
     try:
-        engine = get_engine(settings)
-        with engine.connect() as conn:
-            conn.exec_driver_sql("SELECT 1")
+        # Off the event loop: a slow or unreachable database must not stall other requests.
+        await anyio.to_thread.run_sync(_check_db, settings)
     except Exception:
         logger.exception("Database health check failed")
-        db_ok = False
-        if settings.dev_relaxed_mode:
-            warnings.append("Database unavailable")
+        return False
+    return True
 
-    redis_ok = False
+
+async def _redis_probe(settings: Settings) -> bool:
     try:
         client = await get_redis_client_by_url(settings.redis_url)
-        if client:
-            await client.ping()
-            redis_ok = True
-        else:
+        if not client:
             raise RuntimeError("Redis client unavailable")
+        await client.ping()
     except Exception:
         logger.exception("Redis health check failed")
-        if settings.dev_relaxed_mode:
+        return False
+    return True
+
+
+async def _run_probes(settings: Settings) -> Tuple[bool, bool]:
+    global _last_probe, _probe_in_flight
+    try:
+        db_ok, redis_ok = await asyncio.gather(_db_probe(settings), _redis_probe(settings))
+        _last_probe = (time.monotonic(), (db_ok, redis_ok))
+        return db_ok, redis_ok
+    finally:
+        _probe_in_flight = None
+
+
+async def _probe(settings: Settings) -> Tuple[bool, bool]:
+    """Probe both backends, sharing one run among bursts of health checks."""
+    global _probe_in_flight
+    if _last_probe is not None and time.monotonic() - _last_probe[0] < PROBE_CACHE_SECONDS:
+        return _last_probe[1]
+    task = _probe_in_flight
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = _probe_in_flight = asyncio.ensure_future(_run_probes(settings))
+    # Shielded so one cancelled caller does not abort the probe for the others.
+    return await asyncio.shield(task)
+
+
+@router.get("", response_model=HealthResponse, summary="Service health status")
+async def health(settings: Settings = Depends(get_settings)) -> HealthResponse:
+    db_ok, redis_ok = await _probe(settings)
+    if db_ok and redis_ok:
+        return Response(content=_OK_BODY, media_type="application/json")
+
+    warnings: List[str] = []
+    if settings.dev_relaxed_mode:
+        if not db_ok:
+            warnings.append("Database unavailable")
+        if not redis_ok:
             warnings.append("Redis unavailable")
 
     redis_required = settings.refresh_persistence == "redis"
@@ -52,12 +99,6 @@ async def health(settings: Settings = Depends(get_settings)) -> HealthResponse:
     else:
         status_text = "degraded" if settings.dev_relaxed_mode else "error"
 
-    if status_text != "ok" and settings.dev_relaxed_mode and not warnings:
-        if not db_ok:
-            warnings.append("Database unavailable")
-        elif not redis_ok:
-            warnings.append("Redis unavailable")
-
     response = HealthResponse(
         status=status_text,
         db_ok=db_ok,
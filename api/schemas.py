@@ -23,16 +23,28 @@ class HealthResponse(BaseModel):
     warnings: Optional[List[str]] = None
 
 
+# Built once and shared, rather than a fresh constrained type per field.
+_PasswordStr = constr(min_length=8)
+
+
+def _lower_email(value: str) -> str:
+    return value.lower()
+
+
 class RegisterIn(BaseModel):
     email: EmailStr
-    password: constr(min_length=8)  # type: ignore[valid-type]
+    password: _PasswordStr  # type: ignore[valid-type]
+
+    _normalize_email = validator("email", allow_reuse=True)(_lower_email)
 
 
 class LoginIn(BaseModel):
     email: EmailStr
-    password: constr(min_length=8)  # type: ignore[valid-type]
+    password: _PasswordStr  # type: ignore[valid-type]
     device_fingerprint: Optional[str] = None
 
+    _normalize_email = validator("email", allow_reuse=True)(_lower_email)
+
 
 class TokenPair(BaseModel):
     access_token: str
@@ -85,12 +97,12 @@ class UserListOut(BaseModel):
 
 class AssignRoleIn(BaseModel):
     role: str
-    action: constr(regex="^(add|remove)$")  # type: ignore[valid-type]
+    action: Literal["add", "remove"]
 
 
 class UserUpdateIn(BaseModel):
     is_active: Optional[bool] = None
-    password: Optional[constr(min_length=8)] = None  # type: ignore[valid-type]
+    password: Optional[_PasswordStr] = None  # type: ignore[valid-type]
 
 
 class SessionOut(BaseModel):
@@ -109,6 +121,22 @@ class SessionOut(BaseModel):
 
 class SessionListOut(BaseModel):
     sessions: List[SessionOut]
+    next_before_id: Optional[int] = Field(None, description="Pass as `before_id` to fetch the next page.")
+
+
+def coerce_metadata(value: Any) -> Dict[str, Any]:
+    """Normalise stored audit metadata (dict, JSON text or NULL) to a dict."""
+    if value is None:
+        return {}
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+            return parsed or {}
+        except Exception:
+            return {}
+    return {}
 
 
 class AuditEventOut(BaseModel):
@@ -122,17 +150,7 @@ class AuditEventOut(BaseModel):
 
     @validator("metadata", pre=True)
     def _coerce_metadata(cls, value: Any) -> Dict[str, Any]:
-        if value is None:
-            return {}
-        if isinstance(value, dict):
-            return value
-        if isinstance(value, str):
-            try:
-                parsed = json.loads(value)
-                return parsed or {}
-            except Exception:
-                return {}
-        return {}
+        return coerce_metadata(value)
 
     class Config:
         orm_mode = True
@@ -141,6 +159,7 @@ class AuditEventOut(BaseModel):
 
 class AuditListOut(BaseModel):
     events: List[AuditEventOut]
+    next_cursor: Optional[int] = Field(None, description="Pass as `cursor` to fetch the next page.")
 
 
 class LoginAttemptOut(BaseModel):
@@ -2,23 +2,42 @@
 
 from __future__ import annotations
 
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Iterable, Tuple
-from uuid import uuid4
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
 
 import bcrypt
-from jose import JWTError, jwt
+import jwt
+import orjson
+from cryptography.hazmat.primitives import serialization
+from jwt import InvalidTokenError, PyJWTError, api_jws
 from loguru import logger
 from .config import Settings
 
 ALGORITHM = "HS256"
 BCRYPT_ROUNDS = 12
+MAX_TOKEN_LENGTH = 4096
 
+# bcrypt releases the GIL while hashing, so a thread pool sized to the cores
+# runs hashes in parallel without blocking the event loop.
+_PASSWORD_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
 
-def hash_password(password: str) -> str:
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
     """Hash a plaintext password using bcrypt."""
-    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    salt = bcrypt.gensalt(rounds=rounds)
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
@@ -30,6 +49,99 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
 
 
+def needs_rehash(password_hash: str, rounds: int) -> bool:
+    """Whether a ``$2b$NN$...`` hash was made with fewer than ``rounds`` rounds."""
+    parts = password_hash.split("$")
+    try:
+        return int(parts[2]) < rounds
+    except (IndexError, ValueError):
+        return False
+
+
+async def hash_password_async(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """Hash off the event loop on the shared bcrypt pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_PASSWORD_POOL, hash_password, password, rounds)
+
+
+VERIFIED_PASSWORD_TTL_SECONDS = 60.0
+VERIFIED_PASSWORD_CACHE_SIZE = 4096
+
+# Random per process: the digests below are fast to compute, so an unkeyed one
+# would give anyone who can read process memory a cheap brute-force target.
+_VERIFY_DIGEST_KEY = secrets.token_bytes(32)
+# In-flight bcrypt checks keyed by a digest of (hash, candidate password).
+_inflight_verifications: "Dict[bytes, asyncio.Future[bool]]" = {}
+# Successful checks only, so a wrong guess always pays the full bcrypt cost.
+_verified_passwords: "OrderedDict[bytes, float]" = OrderedDict()
+_verified_passwords_lock = threading.Lock()
+
+
+def _password_check_key(password: str, password_hash: str) -> bytes:
+    return hashlib.blake2b(
+        f"{password_hash}\0{password}".encode("utf-8"), key=_VERIFY_DIGEST_KEY, digest_size=16
+    ).digest()
+
+
+def _recently_verified(key: bytes) -> bool:
+    with _verified_passwords_lock:
+        expires_at = _verified_passwords.get(key)
+        if expires_at is None:
+            return False
+        if expires_at > time.monotonic():
+            return True
+        del _verified_passwords[key]
+        return False
+
+
+def _remember_verified(key: bytes) -> None:
+    with _verified_passwords_lock:
+        _verified_passwords[key] = time.monotonic() + VERIFIED_PASSWORD_TTL_SECONDS
+        _verified_passwords.move_to_end(key)
+        if len(_verified_passwords) > VERIFIED_PASSWORD_CACHE_SIZE:
+            _verified_passwords.popitem(last=False)
+
+
+def reset_verified_password_cache() -> None:
+    with _verified_passwords_lock:
+        _verified_passwords.clear()
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """Verify off the event loop on the shared bcrypt pool.
+
+    A password that matched this hash within the last minute is accepted
+    without re-running bcrypt; the entry dies with the hash when the password
+    changes. Concurrent checks of the same password against the same hash
+    share one bcrypt run. If that run fails, each waiter verifies on its own.
+    """
+    key = _password_check_key(password, password_hash)
+    if _recently_verified(key):
+        return True
+    pending = _inflight_verifications.get(key)
+    if pending is not None:
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_PASSWORD_POOL, verify_password, password, password_hash)
+    _inflight_verifications[key] = future
+
+    def _forget(done: "asyncio.Future[bool]") -> None:
+        if _inflight_verifications.get(key) is done:
+            del _inflight_verifications[key]
+        if not done.cancelled() and done.exception() is None and done.result():
+            _remember_verified(key)
+
+    future.add_done_callback(_forget)
+    # Shielded so a cancelled first caller does not cancel the shared result.
+    return await asyncio.shield(future)
+
+
 def now_utc() -> datetime:
     return datetime.now(tz=timezone.utc)
 
@@ -39,6 +151,7 @@ def _base_claims(
     roles: Iterable[str],
     token_type: str,
     jti: str,
+    issued_at: datetime,
     expires_at: datetime,
 ) -> Dict[str, Any]:
     return {
@@ -46,43 +159,154 @@ def _base_claims(
         "roles": list(roles),
         "jti": jti,
         "type": token_type,
-        "iat": int(now_utc().timestamp()),
+        "iat": int(issued_at.timestamp()),
         "exp": int(expires_at.timestamp()),
     }
 
 
-def create_access_token(user_id: int, roles: Iterable[str], settings: Settings) -> Tuple[str, str, datetime]:
+@lru_cache(maxsize=None)
+def _load_private_key(path: str) -> Any:
+    return serialization.load_pem_private_key(Path(path).read_bytes(), password=None)
+
+
+@lru_cache(maxsize=None)
+def _load_public_key(path: str) -> Any:
+    return serialization.load_pem_public_key(Path(path).read_bytes())
+
+
+def _signing_key(settings: Settings) -> Union[str, Any]:
+    if settings.jwt_algorithm == ALGORITHM:
+        return settings.secret_key
+    return _load_private_key(settings.jwt_private_key_path)
+
+
+def _verification_key(settings: Settings) -> Union[str, Any]:
+    if settings.jwt_algorithm == ALGORITHM:
+        return settings.secret_key
+    return _load_public_key(settings.jwt_public_key_path)
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# Same bytes PyJWT emits for an HS256 header, encoded once.
+_HS256_HEADER = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+
+
+@lru_cache(maxsize=4)
+def _hmac_prototype(secret: str) -> "hmac.HMAC":
+    return hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def _encode_hs256(payload: Dict[str, Any], secret: str) -> str:
+    # Copying a pre-keyed HMAC skips the key schedule on every signature.
+    signing_input = _HS256_HEADER + b"." + _b64url(orjson.dumps(payload))
+    mac = _hmac_prototype(secret).copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode("ascii")
+
+
+def encode_token(payload: Dict[str, Any], settings: Settings) -> str:
+    """Sign a JWT with the configured algorithm and key."""
+    if settings.jwt_algorithm == ALGORITHM:
+        return _encode_hs256(payload, settings.secret_key)
+    # Hand PyJWT the orjson bytes so asymmetric tokens skip its json.dumps pass too.
+    return api_jws.encode(orjson.dumps(payload), _signing_key(settings), algorithm=settings.jwt_algorithm)
+
+
+def create_access_token(
+    user_id: int,
+    roles: Iterable[str],
+    settings: Settings,
+    issued_at: Optional[datetime] = None,
+) -> Tuple[str, str, datetime]:
     """Create a signed access token."""
-    jti = str(uuid4())
-    expires_at = now_utc() + timedelta(minutes=settings.access_token_ttl_min)
-    payload = _base_claims(str(user_id), roles, "access", jti, expires_at)
-    token = jwt.encode(payload, settings.secret_key, algorithm=ALGORITHM)
+    jti = secrets.token_hex(16)
+    issued_at = issued_at or now_utc()
+    expires_at = issued_at + timedelta(minutes=settings.access_token_ttl_min)
+    payload = _base_claims(str(user_id), roles, "access", jti, issued_at, expires_at)
+    token = encode_token(payload, settings)
     return token, jti, expires_at
 
 
-def create_refresh_token(user_id: int, roles: Iterable[str], settings: Settings) -> Tuple[str, str, datetime]:
+def create_refresh_token(
+    user_id: int,
+    roles: Iterable[str],
+    settings: Settings,
+    issued_at: Optional[datetime] = None,
+) -> Tuple[str, str, datetime]:
     """Create a signed refresh token."""
-    jti = str(uuid4())
-    expires_at = now_utc() + timedelta(days=settings.refresh_token_ttl_days)
-    payload = _base_claims(str(user_id), roles, "refresh", jti, expires_at)
-    token = jwt.encode(payload, settings.secret_key, algorithm=ALGORITHM)
+    jti = secrets.token_hex(16)
+    issued_at = issued_at or now_utc()
+    expires_at = issued_at + timedelta(days=settings.refresh_token_ttl_days)
+    payload = _base_claims(str(user_id), roles, "refresh", jti, issued_at, expires_at)
+    token = encode_token(payload, settings)
     return token, jti, expires_at
 
 
+def _check_token_shape(token: str) -> None:
+    # Reject garbage before spending a hash or signature check on it.
+    if len(token) > MAX_TOKEN_LENGTH or token.count(".") != 2:
+        raise InvalidTokenError("Malformed token")
+
+
 def decode_token(token: str, settings: Settings) -> Dict[str, Any]:
     """Decode and validate a JWT."""
+    _check_token_shape(token)
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _verification_key(settings), algorithms=[settings.jwt_algorithm])
         return payload
-    except JWTError as exc:
+    except PyJWTError as exc:
         logger.debug("Token verification failed: {}", exc)
         raise
 
 
+VERIFIED_TOKEN_CACHE_SIZE = 10_000
+
+_verified_tokens: "OrderedDict[Tuple[str, str, bytes], Dict[str, Any]]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
+
+def _verified_cache_key(token: str, settings: Settings) -> Tuple[str, str, bytes]:
+    key_id = settings.secret_key if settings.jwt_algorithm == ALGORITHM else settings.jwt_public_key_path or ""
+    return settings.jwt_algorithm, key_id, hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def decode_token_cached(token: str, settings: Settings) -> Dict[str, Any]:
+    """``decode_token`` memoised until the token's ``exp``.
+
+    A token's signature and claims never change, so a token already verified
+    with the same key is served from a bounded LRU instead of being re-verified.
+    """
+    _check_token_shape(token)
+    key = _verified_cache_key(token, settings)
+    with _verified_tokens_lock:
+        payload = _verified_tokens.get(key)
+        if payload is not None:
+            if payload.get("exp", 0) > time.time():
+                _verified_tokens.move_to_end(key)
+                return payload
+            del _verified_tokens[key]
+
+    payload = decode_token(token, settings)
+    with _verified_tokens_lock:
+        _verified_tokens[key] = payload
+        if len(_verified_tokens) > VERIFIED_TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    return payload
+
+
+def reset_verified_token_cache() -> None:
+    with _verified_tokens_lock:
+        _verified_tokens.clear()
+
+
 def ensure_token_type(payload: Dict[str, Any], expected_type: str) -> None:
     """Validate the token type contained within the payload."""
-    if payload.get("type") != expected_type:
-        raise JWTError(f"Expected token type '{expected_type}' found '{payload.get('type')}'")
+    token_type = payload.get("type")
+    if not isinstance(token_type, str) or not hmac.compare_digest(token_type, expected_type):
+        raise InvalidTokenError(f"Expected token type '{expected_type}' found '{payload.get('type')}'")
 
 
 @dataclass
@@ -97,10 +321,16 @@ class TokenPairResult:
     refresh_jti: str
 
 
-def generate_token_pair(user_id: int, roles: Iterable[str], settings: Settings) -> TokenPairResult:
-    """Generate access and refresh tokens for a given user."""
-    access_token, access_jti, access_exp = create_access_token(user_id, roles, settings)
-    refresh_token, refresh_jti, refresh_exp = create_refresh_token(user_id, roles, settings)
+def generate_token_pair(
+    user_id: int,
+    roles: Iterable[str],
+    settings: Settings,
+    issued_at: Optional[datetime] = None,
+) -> TokenPairResult:
+    """Generate access and refresh tokens for a given user, both stamped with one issue time."""
+    issued_at = issued_at or now_utc()
+    access_token, access_jti, access_exp = create_access_token(user_id, roles, settings, issued_at)
+    refresh_token, refresh_jti, refresh_exp = create_refresh_token(user_id, roles, settings, issued_at)
     return TokenPairResult(
         access_token=access_token,
         refresh_token=refresh_token,
@@ -10,24 +10,33 @@ from ..audit.service import record_event
 from ..config import Settings, get_settings
 from ..deps import get_current_user, get_db, require_roles
 from ..models import Session as SessionModel, User
+from ..responses import UTCJSONResponse
 from ..schemas import SessionListOut, SessionOut
 from ..utils.time import utcnow
 
 router = APIRouter()
 
+_SESSION_COLUMNS = (
+    SessionModel.id,
+    SessionModel.user_id,
+    SessionModel.created_at,
+    SessionModel.last_seen_at,
+    SessionModel.ip,
+    SessionModel.user_agent,
+    SessionModel.device_fingerprint,
+    SessionModel.active,
+)
+
 
 @router.get("", response_model=SessionListOut, dependencies=[Depends(require_roles("admin"))])
 def list_sessions(
     db: Session = Depends(get_db),
-) -> SessionListOut:
-    sessions = (
-        db.execute(
-            select(SessionModel).order_by(SessionModel.created_at.desc())
-        )
-        .scalars()
-        .all()
-    )
-    return SessionListOut(sessions=sessions)
+) -> UTCJSONResponse:
+    # Plain column rows already have the SessionOut shape; returning a Response
+    # skips building and re-validating a model per session.
+    stmt = select(*_SESSION_COLUMNS).order_by(SessionModel.created_at.desc())
+    sessions = [dict(row) for row in db.execute(stmt).mappings()]
+    return UTCJSONResponse({"sessions": sessions, "next_before_id": None})
 
 
 @router.post("/{session_id}/revoke", response_model=SessionOut, dependencies=[Depends(require_roles("admin"))])
@@ -0,0 +1,81 @@
+"""Short-lived cache of authenticated users, keyed by id."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+
+from ..config import Settings
+from ..models import Role, User
+
+USER_CACHE_TTL_SECONDS = 5.0
+USER_CACHE_SIZE = 50_000
+
+# Column values and (id, name) role pairs; never live ORM objects, which belong to one session.
+UserSnapshot = Tuple[Dict[str, Any], Tuple[Tuple[int, str], ...]]
+
+_users: "OrderedDict[Tuple[str, int], Tuple[float, UserSnapshot]]" = OrderedDict()
+_users_lock = threading.Lock()
+
+
+def _snapshot(user: User) -> UserSnapshot:
+    columns = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    return columns, tuple((role.id, role.name) for role in user.roles)
+
+
+def _attach(session: Session, snapshot: UserSnapshot) -> User:
+    columns, roles = snapshot
+    user = User(**columns)
+    user.roles = [Role(id=role_id, name=name) for role_id, name in roles]
+    for obj in (user, *user.roles):
+        make_transient_to_detached(obj)
+    # Attach without a SELECT; instances already in the session take precedence.
+    return session.merge(user, load=False)
+
+
+def get_user_cached(session: Session, settings: Settings, user_id: int) -> Optional[User]:
+    """Load a user with roles, reusing a lookup from the last few seconds.
+
+    Admin changes made through this process invalidate the entry immediately;
+    changes made elsewhere are picked up within ``USER_CACHE_TTL_SECONDS``.
+    """
+    key = (settings.db_url, user_id)
+    now = time.monotonic()
+    snapshot: Optional[UserSnapshot] = None
+    with _users_lock:
+        entry = _users.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _users.move_to_end(key)
+                snapshot = entry[1]
+            else:
+                del _users[key]
+    if snapshot is not None:
+        return _attach(session, snapshot)
+
+    user = (
+        session.execute(select(User).options(joinedload(User.roles)).where(User.id == user_id))
+        .unique()
+        .scalar_one_or_none()
+    )
+    if user is not None:
+        with _users_lock:
+            _users[key] = (now + USER_CACHE_TTL_SECONDS, _snapshot(user))
+            if len(_users) > USER_CACHE_SIZE:
+                _users.popitem(last=False)
+    return user
+
+
+def invalidate_user(settings: Settings, user_id: int) -> None:
+    with _users_lock:
+        _users.pop((settings.db_url, user_id), None)
+
+
+def reset_user_cache() -> None:
+    with _users_lock:
+        _users.clear()
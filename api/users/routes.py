@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+from typing import Any, Dict
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from ..config import Settings, get_settings
 from ..deps import get_current_user, get_db, require_any_role, require_roles
 from ..models import User
+from ..responses import UTCJSONResponse
 from ..schemas import AssignRoleIn, UserListOut, UserOut, UserUpdateIn
 from .service import UserService
 
@@ -18,13 +21,29 @@ def _service(settings: Settings, db: Session) -> UserService:
     return UserService(settings, db)
 
 
+def _user_row(user: User) -> Dict[str, Any]:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "is_active": user.is_active,
+        "roles": [role.name for role in user.roles],
+        "created_at": user.created_at,
+        "updated_at": user.updated_at,
+        "last_login_at": user.last_login_at,
+        "last_login_ip": user.last_login_ip,
+        "last_login_ua": user.last_login_ua,
+    }
+
+
 @router.get("", response_model=UserListOut, dependencies=[Depends(require_any_role("admin", "moderator"))])
 def list_users(
     settings: Settings = Depends(get_settings),
     db: Session = Depends(get_db),
-) -> UserListOut:
+) -> UTCJSONResponse:
+    # Stored rows were validated on the way in; serialise them directly rather
+    # than through a UserOut per user.
     users = _service(settings, db).list_users()
-    return UserListOut(users=[UserOut.from_orm(user) for user in users])
+    return UTCJSONResponse({"users": [_user_row(user) for user in users]})
 
 
 @router.get("/{user_id}", response_model=UserOut, dependencies=[Depends(require_any_role("admin", "moderator"))])
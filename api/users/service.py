@@ -6,13 +6,14 @@ from typing import List, Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
 
 from ..audit.service import record_event
 from ..config import Settings
 from ..models import Role, User
 from ..schemas import AssignRoleIn, UserUpdateIn
 from ..security import hash_password
+from .cache import invalidate_user
 
 
 class UserService:
@@ -21,10 +22,13 @@ class UserService:
         self.db = db
 
     def list_users(self) -> List[User]:
-        return list(self.db.execute(select(User)).scalars().all())
+        # Roles in one extra IN query; any other lazy load here would be an N+1, so fail loudly.
+        stmt = select(User).options(selectinload(User.roles), raiseload("*"))
+        return list(self.db.execute(stmt).scalars().all())
 
     def get_user(self, user_id: int) -> User:
-        user = self.db.get(User, user_id)
+        # Roles ride along in the same SELECT rather than a follow-up selectin query.
+        user = self.db.get(User, user_id, options=[joinedload(User.roles)])
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
@@ -50,6 +54,7 @@ class UserService:
             metadata={"target_user": user.email, "role": payload.role, "action": payload.action},
         )
         self.db.commit()
+        invalidate_user(self.settings, user.id)
         return user
 
     def update_user(self, user_id: int, payload: UserUpdateIn, actor: User) -> User:
@@ -57,7 +62,7 @@ class UserService:
         if payload.is_active is not None:
             user.is_active = payload.is_active
         if payload.password:
-            user.password_hash = hash_password(payload.password)
+            user.password_hash = hash_password(payload.password, self.settings.bcrypt_rounds)
 
         record_event(
             self.db,
@@ -69,6 +74,7 @@ class UserService:
             metadata={"target_user": user.email, "changed": payload.dict(exclude_none=True)},
         )
         self.db.commit()
+        invalidate_user(self.settings, user.id)
         return user
 
     def _get_or_create_role(self, name: str) -> Role:
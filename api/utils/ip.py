@@ -6,15 +6,20 @@ from dataclasses import dataclass
 from typing import Dict, Optional
 
 from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+USER_AGENT_MAX_LENGTH = 256
 
 
 def client_ip(request: Request) -> str:
     """Return the best-effort client IP from headers."""
-    for header in ("x-forwarded-for", "x-real-ip"):
-        value = request.headers.get(header)
-        if value:
-            return value.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+    headers = request.headers
+    value = headers.get("x-forwarded-for") or headers.get("x-real-ip")
+    if value:
+        # Only the left-most hop matters; don't split the whole proxy chain.
+        return value.partition(",")[0].strip()
+    client = request.client
+    return client.host if client else "unknown"
 
 
 def user_agent(request: Request) -> str:
@@ -22,6 +27,20 @@ def user_agent(request: Request) -> str:
     return request.headers.get("user-agent", "unknown")
 
 
+class ClientContextMiddleware:
+    """Resolve client IP and user agent once per request onto ``request.state``."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            request = Request(scope)
+            request.state.ip = client_ip(request)
+            request.state.ua = user_agent(request)[:USER_AGENT_MAX_LENGTH]
+        await self.app(scope, receive, send)
+
+
 @dataclass
 class GeoInfo:
     """Stub structure for geo lookup results."""
@@ -39,5 +58,4 @@ def geo_lookup(ip: str) -> GeoInfo:
 
 def fingerprint(ip: str, user_agent: str, device_fingerprint: Optional[str]) -> str:
     """Return a deterministic fingerprint string."""
-    parts = [ip or "unknown", user_agent or "unknown", device_fingerprint or "na"]
-    return "|".join(parts)
+    return f"{ip or 'unknown'}|{user_agent or 'unknown'}|{device_fingerprint or 'na'}"
@@ -3,8 +3,9 @@ import os
 
 engine = create_engine(os.getenv("DATABASE_URL", "sqlite:///sentinelauth.db"))
 
-with engine.begin() as conn:
-    rows = conn.execute(
+with engine.connect() as conn:
+    # Stream rows straight to stdout instead of materialising every user first.
+    rows = conn.execution_options(stream_results=True).execute(
         text(
             """
             SELECT u.email, GROUP_CONCAT(r.name) AS roles
@@ -15,7 +16,6 @@ with engine.begin() as conn:
             ORDER BY u.email
             """
         )
-    ).mappings().all()
-
-for row in rows:
-    print(dict(row))
+    )
+    for row in rows.mappings():
+        print(dict(row))
@@ -0,0 +1,33 @@
+"""Add composite indexes backing the audit listing query."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "202501020003"
+down_revision = "202501020002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_audit_events_user_event_ts",
+        "audit_events",
+        ["user_id", "event_type", sa.text("ts DESC")],
+        postgresql_using="btree",
+    )
+    op.create_index(
+        "ix_audit_events_ts",
+        "audit_events",
+        [sa.text("ts DESC")],
+        postgresql_using="btree",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_events_ts", table_name="audit_events")
+    op.drop_index("ix_audit_events_user_event_ts", table_name="audit_events")
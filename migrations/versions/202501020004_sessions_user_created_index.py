@@ -0,0 +1,26 @@
+"""Add a covering index for per-user session listings."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "202501020004"
+down_revision = "202501020003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_sessions_user_created",
+        "sessions",
+        ["user_id", sa.text("created_at DESC")],
+        postgresql_include=["id", "last_seen_at", "ip", "user_agent", "device_fingerprint", "active"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_user_created", table_name="sessions")
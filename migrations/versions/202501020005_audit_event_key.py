@@ -0,0 +1,23 @@
+"""Add a dedupe key for audit events delivered through the audit stream."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "202501020005"
+down_revision = "202501020004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("audit_events", sa.Column("event_key", sa.String(length=32), nullable=True))
+    op.create_index("ux_audit_events_event_key", "audit_events", ["event_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_audit_events_event_key", table_name="audit_events")
+    op.drop_column("audit_events", "event_key")
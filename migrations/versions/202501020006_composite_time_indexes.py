@@ -0,0 +1,40 @@
+"""Replace single-column audit/login-attempt indexes with (column, ts) composites."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "202501020006"
+down_revision = "202501020005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_audit_events_type_ts",
+        "audit_events",
+        ["event_type", sa.text("ts DESC")],
+        postgresql_using="btree",
+    )
+    op.create_index(
+        "ix_login_attempts_email_ts",
+        "login_attempts",
+        ["email", sa.text("ts DESC")],
+        postgresql_using="btree",
+    )
+    # Prefixes of ix_audit_events_user_event_ts and the composites above.
+    op.drop_index("ix_audit_events_user_id", table_name="audit_events")
+    op.drop_index("ix_audit_events_event_type", table_name="audit_events")
+    op.drop_index("ix_login_attempts_email", table_name="login_attempts")
+
+
+def downgrade() -> None:
+    op.create_index("ix_login_attempts_email", "login_attempts", ["email"])
+    op.create_index("ix_audit_events_event_type", "audit_events", ["event_type"])
+    op.create_index("ix_audit_events_user_id", "audit_events", ["user_id"])
+    op.drop_index("ix_login_attempts_email_ts", table_name="login_attempts")
+    op.drop_index("ix_audit_events_type_ts", table_name="audit_events")
@@ -33,7 +33,7 @@ def seed_admin() -> None:
 
         user = User(
             email=settings.seed_admin_email,
-            password_hash=hash_password(settings.seed_admin_password),
+            password_hash=hash_password(settings.seed_admin_password, settings.bcrypt_rounds),
             is_active=True,
         )
         user.roles.append(admin_role)
@@ -7,9 +7,11 @@ import gc
 import time
 from typing import AsyncGenerator
 
+import fakeredis.aioredis as fakeredis
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from loguru import logger
 
 
 # Ensure imports work when tests are launched via PowerShell (repo root not auto-added).
@@ -18,30 +20,42 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 os.environ.setdefault("APP_ENV", "test")
-os.environ.setdefault("SECRET_KEY", "test-secret-key-123456")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-0123456789abcdef0123")
 os.environ.setdefault("ACCESS_TOKEN_TTL_MIN", "15")
 os.environ.setdefault("REFRESH_TOKEN_TTL_DAYS", "7")
 os.environ.setdefault("API_PORT", "8001")
-os.environ.setdefault("DB_URL", "sqlite:///./sentinelauth_test.db")
+# One SQLite file per pytest-xdist worker so ``pytest -n auto`` runs stay isolated.
+# Workers inherit the controller's environment, so their URL must be forced.
+_XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+if _XDIST_WORKER:
+    TEST_DB_FILE = f"sentinelauth_test_{_XDIST_WORKER}.db"
+    os.environ["DB_URL"] = f"sqlite:///./{TEST_DB_FILE}"
+else:
+    TEST_DB_FILE = "sentinelauth_test.db"
+    os.environ.setdefault("DB_URL", f"sqlite:///./{TEST_DB_FILE}")
 os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
 os.environ.setdefault("REFRESH_PERSISTENCE", "db")
+# Real bcrypt at a cheap cost; still above the 4 rounds the rehash tests use as "weak".
+os.environ.setdefault("BCRYPT_ROUNDS", "5")
 
 from api.main import create_app  # noqa: E402
 from api.config import get_settings  # noqa: E402
 from api.db import Base, get_engine, get_session_factory  # noqa: E402
 from api.deps import get_redis  # noqa: E402
 from api import redis_client as redis_module  # noqa: E402
+from api.auth.service import reset_default_role_cache  # noqa: E402
+from api.users.cache import reset_user_cache  # noqa: E402
+from api.security import reset_verified_password_cache  # noqa: E402
 
-
-try:
-    import fakeredis.aioredis as fakeredis
-except ImportError:  # pragma: no cover
-    fakeredis = None  # type: ignore
+# Warnings and errors still reach a failing test's captured output, without loguru's
+# variable-annotated tracebacks, which are costly to render for the many expected errors.
+logger.remove()
+logger.add(sys.stderr, level="WARNING", backtrace=False, diagnose=False)
 
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_database():
-    db_path = Path("sentinelauth_test.db")
+    db_path = Path(TEST_DB_FILE)
     if db_path.exists():
         db_path.unlink()
     settings = get_settings()
@@ -72,36 +86,37 @@ def clean_database():
         session.commit()
     finally:
         session.close()
+    reset_default_role_cache()
+    reset_user_cache()
+    reset_verified_password_cache()
+
+
+@pytest.fixture(scope="session")
+def app():
+    # Routing and middleware are stateless between requests; build them once.
+    return create_app()
 
 
 @pytest_asyncio.fixture
-async def client() -> AsyncGenerator[AsyncClient, None]:
+async def client(app) -> AsyncGenerator[AsyncClient, None]:
     settings = get_settings()
     redis_module._clients.clear()
     redis_module._last_url = settings.redis_url
 
-    app = create_app()
-    fake = fakeredis.FakeRedis() if fakeredis else None
-    if fake:
-        redis_module._clients[settings.redis_url] = fake
-        redis_module._last_url = settings.redis_url
-        await fake.flushall()
-        app.state.test_redis = fake
-    else:
-        app.state.test_redis = None
+    # Fake Redis stays per test: its connections belong to the test's event loop.
+    fake = fakeredis.FakeRedis()
+    redis_module._clients[settings.redis_url] = fake
+    await fake.flushall()
+    app.state.test_redis = fake
 
     async def _override_redis():
-        if fake:
-            return fake
-        from redis.asyncio import Redis
-
-        return Redis.from_url(os.environ["REDIS_URL"])
+        return fake
 
+    app.dependency_overrides.clear()
     app.dependency_overrides[get_redis] = _override_redis
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as async_client:
         yield async_client
 
-    if fake:
-        await fake.flushall()
+    await fake.flushall()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import smtplib
+from contextlib import suppress
+from email.message import EmailMessage
+from unittest import mock
+
+import pytest
+import pytest_asyncio
+
+from api.alerts.service import AlertService, alert_worker, enqueue_alert, get_alert_service
+from api.config import get_settings
+
+
+def _email() -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = "alert"
+    message.set_content("body")
+    return message
+
+
+def test_smtp_session_is_reused_between_alerts():
+    settings = get_settings().copy(update={"smtp_host": "smtp.test", "smtp_port": 587})
+    service = AlertService(settings)
+
+    with mock.patch("api.alerts.service.smtplib.SMTP") as smtp_cls:
+        smtp = smtp_cls.return_value
+        smtp.noop.return_value = (250, b"OK")
+
+        service._send_email_blocking(_email())
+        service._send_email_blocking(_email())
+
+    smtp_cls.assert_called_once_with("smtp.test", 587)
+    smtp.starttls.assert_called_once()
+    smtp.login.assert_called_once()
+    assert smtp.send_message.call_count == 2
+
+
+def test_smtp_reconnects_after_disconnect():
+    settings = get_settings().copy(update={"smtp_host": "smtp.test", "smtp_port": 587})
+    service = AlertService(settings)
+
+    with mock.patch("api.alerts.service.smtplib.SMTP") as smtp_cls:
+        stale, fresh = mock.MagicMock(), mock.MagicMock()
+        smtp_cls.side_effect = [stale, fresh]
+        stale.noop.return_value = (250, b"OK")
+        stale.send_message.side_effect = smtplib.SMTPServerDisconnected()
+
+        service._send_email_blocking(_email())
+
+    assert smtp_cls.call_count == 2
+    fresh.send_message.assert_called_once()
+
+
+async def _wait_for_delivery(notify: mock.AsyncMock) -> None:
+    for _ in range(100):
+        if notify.await_count:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def alert_worker_task():
+    """Run a worker (and therefore a fresh queue) on this test's event loop only."""
+    worker = asyncio.create_task(alert_worker())
+    await asyncio.sleep(0)
+    yield worker
+    worker.cancel()
+    with suppress(asyncio.CancelledError):
+        await worker
+
+
+@pytest.mark.asyncio
+async def test_alert_worker_drains_queue(alert_worker_task):
+    service = AlertService(get_settings())
+    service.notify = mock.AsyncMock()  # type: ignore[method-assign]
+
+    enqueue_alert(service, "subject", "message", {"severity": "high"})
+    await _wait_for_delivery(service.notify)
+
+    service.notify.assert_awaited_once_with("subject", "message", {"severity": "high"})
+
+
+@pytest.mark.asyncio
+async def test_alerts_are_delivered_directly_without_a_worker():
+    service = AlertService(get_settings())
+    service.notify = mock.AsyncMock()  # type: ignore[method-assign]
+
+    enqueue_alert(service, "subject", "message", {"severity": "medium"})
+    await _wait_for_delivery(service.notify)
+
+    service.notify.assert_awaited_once_with("subject", "message", {"severity": "medium"})
+
+
+@pytest.mark.asyncio
+async def test_slack_payload_is_json_encoded():
+    settings = get_settings().copy(update={"slack_webhook_url": "https://hooks.test/alert"})
+    service = AlertService(settings)
+    http = mock.AsyncMock(is_closed=False)
+    service._http = http
+
+    await service._send_slack("subject", "message", {"severity": "high", "nested": {"ip": "10.0.0.1"}})
+
+    kwargs = http.post.await_args.kwargs
+    assert kwargs["headers"] == {"content-type": "application/json"}
+    text = json.loads(kwargs["content"])["text"]
+    assert '{"severity":"high","nested":{"ip":"10.0.0.1"}}' in text
+
+
+def test_alert_service_is_shared_per_settings():
+    settings = get_settings()
+    other = settings.copy(update={"alert_channels": ["slack"]})
+
+    assert get_alert_service(settings) is get_alert_service(settings)
+    assert get_alert_service(other) is not get_alert_service(settings)
+    assert get_alert_service(other).settings is other
@@ -1,10 +1,35 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
 import pytest
 
+from api.audit.service import purge_expired_events, record_event
+from api.audit.stream import (
+    AUDIT_DEAD_LETTER_KEY,
+    AUDIT_STREAM_GROUP,
+    AUDIT_STREAM_KEY,
+    MAX_DELIVERIES,
+    claim_idle,
+    consume_batch,
+    dead_letter_exhausted,
+    ensure_consumer_group,
+    publish_events,
+)
 from api.config import get_settings
 from api.db import get_session_factory
-from api.models import AuditEvent
+from api.models import AuditEvent, Role, User
+from api.ratelimit import reset_memory_rate_limiter
+from api.redis_client import is_known_device, remember_device
+from api.security import hash_password
+from api.utils.time import utcnow
+
+
+@pytest.fixture(autouse=True)
+def _reset_rate_limits():
+    reset_memory_rate_limiter()
+    yield
+    reset_memory_rate_limiter()
 
 
 @pytest.mark.asyncio
@@ -18,7 +43,238 @@ async def test_audit_records_created(client):
     settings = get_settings()
     session = get_session_factory(settings)()
     try:
-        events = session.query(AuditEvent).filter(AuditEvent.event_type.in_(["user.register", "user.login"])).all()
-        assert len(events) >= 2
+        count = session.query(AuditEvent).filter(AuditEvent.event_type.in_(["user.register", "user.login"])).count()
+        assert count >= 2
+    finally:
+        session.close()
+
+
+def _seed_admin(email: str = "auditor@example.com", password: str = "AdminPass123!") -> None:
+    settings = get_settings()
+    session = get_session_factory(settings)()
+    try:
+        admin_role = session.query(Role).filter(Role.name == "admin").one_or_none()
+        if not admin_role:
+            admin_role = Role(name="admin")
+            session.add(admin_role)
+            session.flush()
+        admin = User(email=email, password_hash=hash_password(password), is_active=True)
+        admin.roles.append(admin_role)
+        session.add(admin)
+        session.commit()
     finally:
         session.close()
+
+
+@pytest.mark.asyncio
+async def test_audit_listing_is_bounded_and_newest_first(client):
+    await client.post("/auth/register", json={"email": "trail@example.com", "password": "ChangeMe123!"})
+    await client.post("/auth/login", json={"email": "trail@example.com", "password": "ChangeMe123!"})
+
+    _seed_admin()
+    login = await client.post("/auth/login", json={"email": "auditor@example.com", "password": "AdminPass123!"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    resp = await client.get("/audit", params={"hours": 1}, headers=headers)
+    assert resp.status_code == 200
+    events = resp.json()["events"]
+    assert len(events) >= 3
+    assert [e["id"] for e in events] == sorted((e["id"] for e in events), reverse=True)
+    assert all(isinstance(e["metadata"], dict) for e in events)
+    assert all(e["ts"].endswith("Z") for e in events)
+
+    limited = await client.get("/audit", params={"limit": 1}, headers=headers)
+    assert limited.status_code == 200
+    assert len(limited.json()["events"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_audit_listing_keyset_pagination(client):
+    for idx in range(3):
+        await client.post("/auth/register", json={"email": f"page{idx}@example.com", "password": "ChangeMe123!"})
+
+    _seed_admin()
+    login = await client.post("/auth/login", json={"email": "auditor@example.com", "password": "AdminPass123!"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    first = (await client.get("/audit", params={"limit": 2}, headers=headers)).json()
+    assert len(first["events"]) == 2
+    assert first["next_cursor"] == first["events"][-1]["id"]
+
+    second = (await client.get("/audit", params={"limit": 2, "cursor": first["next_cursor"]}, headers=headers)).json()
+    first_ids = {e["id"] for e in first["events"]}
+    assert second["events"]
+    assert all(e["id"] < first["next_cursor"] and e["id"] not in first_ids for e in second["events"])
+
+
+@pytest.mark.asyncio
+async def test_audit_keyset_pagination_ignores_ts_order(client):
+    now = utcnow()
+    session = get_session_factory(get_settings())()
+    try:
+        for minutes in (60, 30, 45):
+            session.add(AuditEvent(event_type="paging.skew", ts=now - timedelta(minutes=minutes)))
+        session.commit()
+    finally:
+        session.close()
+
+    _seed_admin()
+    login = await client.post("/auth/login", json={"email": "auditor@example.com", "password": "AdminPass123!"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    seen, cursor = [], None
+    for _ in range(4):
+        params = {"event_type": "paging.skew", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get("/audit", params=params, headers=headers)).json()
+        seen.extend(e["id"] for e in page["events"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 3 and len(set(seen)) == 3
+
+
+def test_purge_expired_events_respects_retention():
+    settings = get_settings()
+    session = get_session_factory(settings)()
+    try:
+        session.add_all(
+            [
+                AuditEvent(event_type="stale", ts=utcnow() - timedelta(days=settings.audit_retention_days + 1)),
+                AuditEvent(event_type="fresh", ts=utcnow()),
+            ]
+        )
+        session.commit()
+    finally:
+        session.close()
+
+    assert purge_expired_events(settings, batch_size=1) == 1
+
+    session = get_session_factory(settings)()
+    try:
+        remaining = [event.event_type for event in session.query(AuditEvent).all()]
+        assert remaining == ["fresh"]
+    finally:
+        session.close()
+
+
+def test_buffered_events_are_written_on_commit_only():
+    settings = get_settings()
+    session = get_session_factory(settings)()
+    try:
+        record_event(session, settings, "buffered.rolled_back", None, None, None)
+        session.rollback()
+        record_event(session, settings, "buffered.one", None, None, None)
+        record_event(session, settings, "buffered.two", None, None, None)
+        assert session.query(AuditEvent).filter(AuditEvent.event_type.like("buffered.%")).count() == 0
+        session.commit()
+
+        stored = {
+            event_type
+            for (event_type,) in session.query(AuditEvent.event_type).filter(AuditEvent.event_type.like("buffered.%"))
+        }
+        assert stored == {"buffered.one", "buffered.two"}
+    finally:
+        session.close()
+
+
+@pytest.mark.asyncio
+async def test_known_device_filter_tracks_login_tuples(client):
+    redis = client._transport.app.state.test_redis
+    if redis is None:
+        pytest.skip("fakeredis not installed")
+
+    assert not await is_known_device(42, "10.0.0.1", "agent", client=redis)
+    await remember_device(42, "10.0.0.1", "agent", client=redis)
+    assert await is_known_device(42, "10.0.0.1", "agent", client=redis)
+    assert not await is_known_device(42, "10.0.0.2", "agent", client=redis)
+
+
+@pytest.mark.asyncio
+async def test_return_to_known_device_is_not_flagged(client):
+    if client._transport.app.state.test_redis is None:
+        pytest.skip("fakeredis not installed")
+
+    creds = {"email": "devices@example.com", "password": "ChangeMe123!"}
+    laptop, phone = {"User-Agent": "laptop"}, {"User-Agent": "phone"}
+    await client.post("/auth/register", json=creds, headers=laptop)
+    for headers in (laptop, phone, laptop):
+        assert (await client.post("/auth/login", json=creds, headers=headers)).status_code == 200
+
+    session = get_session_factory(get_settings())()
+    try:
+        user_id = session.query(User.id).filter(User.email == creds["email"]).scalar()
+        severities = [
+            event.meta["severity"]
+            for event in session.query(AuditEvent)
+            .filter(AuditEvent.user_id == user_id, AuditEvent.event_type == "user.login")
+            .order_by(AuditEvent.id)
+        ]
+    finally:
+        session.close()
+    assert severities == ["low", "medium", "low"]
+
+
+def _stored_count(event_type: str) -> int:
+    session = get_session_factory(get_settings())()
+    try:
+        return session.query(AuditEvent).filter(AuditEvent.event_type == event_type).count()
+    finally:
+        session.close()
+
+
+def _stream_row(event_type: str, **overrides) -> dict:
+    row = {"user_id": None, "event_type": event_type, "ip": "10.0.0.9", "user_agent": "agent", "meta": None}
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.asyncio
+async def test_audit_stream_batch_keeps_event_time_and_dedupes(client):
+    redis = client._transport.app.state.test_redis
+    if redis is None:
+        pytest.skip("fakeredis not installed")
+
+    settings = get_settings()
+    ts = utcnow() - timedelta(minutes=10)
+    row = _stream_row("streamed.login", ts=ts, event_key="a" * 32)
+    await ensure_consumer_group(redis)
+    # The same entry published twice models a redelivery after a crash before XACK.
+    await publish_events(redis, [row, row])
+
+    assert await consume_batch(settings, redis, "test-consumer") == 2
+    assert (await redis.xpending(AUDIT_STREAM_KEY, AUDIT_STREAM_GROUP))["pending"] == 0
+
+    session = get_session_factory(settings)()
+    try:
+        stored = session.query(AuditEvent).filter(AuditEvent.event_type == "streamed.login").one()
+    finally:
+        session.close()
+    assert abs((stored.ts.replace(tzinfo=None) - ts.replace(tzinfo=None)).total_seconds()) < 1
+
+
+@pytest.mark.asyncio
+async def test_audit_stream_claims_abandoned_and_dead_letters_exhausted(client):
+    redis = client._transport.app.state.test_redis
+    if redis is None:
+        pytest.skip("fakeredis not installed")
+
+    settings = get_settings()
+    await ensure_consumer_group(redis)
+    row = _stream_row("streamed.abandoned")
+    await publish_events(redis, [row])
+    # A consumer that crashed after reading leaves the entry pending under its name.
+    await redis.xreadgroup(AUDIT_STREAM_GROUP, "crashed", {AUDIT_STREAM_KEY: ">"}, count=10)
+
+    assert await claim_idle(settings, redis, "survivor", min_idle_ms=0) == 1
+    assert _stored_count("streamed.abandoned") == 1
+
+    await publish_events(redis, [{**row, "event_type": "streamed.poison"}])
+    await redis.xreadgroup(AUDIT_STREAM_GROUP, "crashed", {AUDIT_STREAM_KEY: ">"}, count=10)
+    for _ in range(MAX_DELIVERIES - 1):
+        await redis.xautoclaim(AUDIT_STREAM_KEY, AUDIT_STREAM_GROUP, "crashed", min_idle_time=0, start_id="0-0")
+
+    assert await dead_letter_exhausted(redis) == 1
+    assert (await redis.xpending(AUDIT_STREAM_KEY, AUDIT_STREAM_GROUP))["pending"] == 0
+    assert await redis.xlen(AUDIT_DEAD_LETTER_KEY) == 1
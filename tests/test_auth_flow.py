@@ -1,6 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import suppress
+
+import jwt
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from sqlalchemy import select
+
+from api.auth.attempts import login_attempt_writer
+from api.auth.service import AuthService
+from api.config import get_settings
+from api.db import db_session
+from api.models import LoginAttempt, User
+from api import security
+from api.routes import health
+from api.security import create_access_token, decode_token, encode_token
+
 
 @pytest.mark.asyncio
 async def test_full_auth_flow(client):
@@ -35,3 +52,199 @@ async def test_full_auth_flow(client):
 
     post_logout_resp = await client.post("/auth/refresh", json={"refresh_token": new_refresh})
     assert post_logout_resp.status_code == 401
+
+    sessions = (
+        await client.get("/auth/me/sessions", headers={"Authorization": f"Bearer {refreshed['access_token']}"})
+    ).json()["sessions"]
+    assert [session["active"] for session in sessions] == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_my_sessions_keyset_pagination(client, monkeypatch):
+    monkeypatch.setattr("api.auth.routes.SESSIONS_PAGE_SIZE", 2)
+    creds = {"email": "sessions@example.com", "password": "ChangeMe123!"}
+    tokens = (await client.post("/auth/register", json=creds)).json()
+    for _ in range(2):
+        tokens = (await client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    first = (await client.get("/auth/me/sessions", headers=headers)).json()
+    assert len(first["sessions"]) == 2
+    assert first["next_before_id"] == first["sessions"][-1]["id"]
+
+    second = (await client.get("/auth/me/sessions", params={"before_id": first["next_before_id"]}, headers=headers)).json()
+    assert len(second["sessions"]) == 1
+    assert second["sessions"][0]["id"] < first["next_before_id"]
+    assert second["next_before_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_registrations_share_cached_default_role(client):
+    for email in ("role-a@example.com", "role-b@example.com"):
+        tokens = (await client.post("/auth/register", json={"email": email, "password": "ChangeMe123!"})).json()
+        me = await client.get("/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+        assert me.json()["roles"] == ["user"]
+    assert AuthService._default_role_id is not None
+
+
+def test_eddsa_tokens_round_trip(tmp_path):
+    private_key = Ed25519PrivateKey.generate()
+    private_path = tmp_path / "jwt_ed25519.pem"
+    public_path = tmp_path / "jwt_ed25519.pub"
+    private_path.write_bytes(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    public_path.write_bytes(
+        private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+    settings = get_settings().copy(
+        update={
+            "jwt_algorithm": "EdDSA",
+            "jwt_private_key_path": str(private_path),
+            "jwt_public_key_path": str(public_path),
+        }
+    )
+
+    token, jti, _ = create_access_token(7, ["user"], settings)
+    assert jwt.get_unverified_header(token)["alg"] == "EdDSA"
+    payload = decode_token(token, settings)
+    assert payload["sub"] == "7"
+    assert payload["jti"] == jti
+
+    with pytest.raises(jwt.PyJWTError):
+        decode_token(token, get_settings())
+
+
+@pytest.mark.asyncio
+async def test_login_attempts_written_by_background_writer(client):
+    settings = get_settings()
+    writer = asyncio.create_task(login_attempt_writer(settings))
+    await asyncio.sleep(0)
+    creds = {"email": "attempts@example.com", "password": "ChangeMe123!"}
+    try:
+        assert (await client.post("/auth/register", json=creds)).status_code == 200
+        bad = await client.post("/auth/login", json={**creds, "password": "WrongPass123!"})
+        assert bad.status_code == 401
+        assert (await client.post("/auth/login", json=creds)).status_code == 200
+    finally:
+        writer.cancel()
+        with suppress(asyncio.CancelledError):
+            await writer
+
+    with db_session(settings) as session:
+        outcomes = session.scalars(
+            select(LoginAttempt.success).where(LoginAttempt.email == creds["email"]).order_by(LoginAttempt.id)
+        ).all()
+    assert outcomes == [False, True]
+
+
+def test_hs256_tokens_match_pyjwt():
+    settings = get_settings()
+    payload = {"sub": "7", "roles": ["user"], "jti": "abc", "type": "access", "iat": 1, "exp": 2}
+    assert encode_token(payload, settings) == jwt.encode(payload, settings.secret_key, algorithm="HS256")
+
+
+@pytest.mark.asyncio
+async def test_email_is_case_insensitive(client):
+    resp = await client.post("/auth/register", json={"email": "Mixed.Case@Example.com", "password": "ChangeMe123!"})
+    assert resp.status_code == 200
+    login = await client.post("/auth/login", json={"email": "MIXED.CASE@example.com", "password": "ChangeMe123!"})
+    assert login.status_code == 200
+
+
+def test_verified_tokens_are_cached_until_expiry(monkeypatch):
+    settings = get_settings()
+    token, jti, _ = create_access_token(7, ["user"], settings)
+    security.reset_verified_token_cache()
+    calls = []
+    real_decode = security.decode_token
+
+    def _counting_decode(token, settings):
+        calls.append(token)
+        return real_decode(token, settings)
+
+    monkeypatch.setattr(security, "decode_token", _counting_decode)
+    assert security.decode_token_cached(token, settings)["jti"] == jti
+    assert security.decode_token_cached(token, settings)["jti"] == jti
+    assert len(calls) == 1
+
+    # Once past exp the cached entry is dropped and the token verified again.
+    monkeypatch.setattr(security.time, "time", lambda: 2**40)
+    security.decode_token_cached(token, settings)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_malformed_bearer_tokens_are_rejected(client):
+    for token in ("not-a-jwt", "a.b.c.d", "a." + "x" * 5000 + ".c"):
+        resp = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_password_checks_share_one_hash(monkeypatch):
+    calls = []
+    real_verify = security.verify_password
+
+    def counting_verify(password: str, password_hash: str) -> bool:
+        calls.append(password)
+        return real_verify(password, password_hash)
+
+    monkeypatch.setattr(security, "verify_password", counting_verify)
+    stored = security.hash_password("ChangeMe123!", rounds=4)
+    results = await asyncio.gather(
+        *(security.verify_password_async("ChangeMe123!", stored) for _ in range(5)),
+        security.verify_password_async("WrongPass123!", stored),
+    )
+    assert results == [True] * 5 + [False]
+    assert sorted(calls) == ["ChangeMe123!", "WrongPass123!"]
+    assert not security._inflight_verifications
+
+
+    # Recent successes skip bcrypt; failures are never remembered.
+    assert await security.verify_password_async("ChangeMe123!", stored)
+    assert not await security.verify_password_async("WrongPass123!", stored)
+    assert sorted(calls) == ["ChangeMe123!", "WrongPass123!", "WrongPass123!"]
+
+
+@pytest.mark.asyncio
+async def test_health_reports_both_probes(client, monkeypatch):
+    monkeypatch.setattr(health, "_last_probe", None)
+    resp = await client.get("/health")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ok", "db_ok": True, "redis_ok": True, "warnings": None}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_health_checks_share_one_probe(client, monkeypatch):
+    calls = []
+    real_check = health._check_db
+    monkeypatch.setattr(health, "_last_probe", None)
+    monkeypatch.setattr(health, "_check_db", lambda settings: calls.append(1) or real_check(settings))
+
+    responses = await asyncio.gather(*(client.get("/health") for _ in range(5)))
+    assert [resp.status_code for resp in responses] == [200] * 5
+    await client.get("/health")
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_login_upgrades_weaker_password_hashes(client):
+    settings = get_settings()
+    with db_session(settings) as session:
+        session.add(User(email="legacy@example.com", password_hash=security.hash_password("ChangeMe123!", rounds=4)))
+
+    creds = {"email": "legacy@example.com", "password": "ChangeMe123!"}
+    assert (await client.post("/auth/login", json=creds)).status_code == 200
+    with db_session(settings) as session:
+        stored = session.scalars(select(User.password_hash).where(User.email == creds["email"])).one()
+    assert not security.needs_rehash(stored, settings.bcrypt_rounds)
+    assert stored.split("$")[2] == f"{settings.bcrypt_rounds:02d}"
+    assert (await client.post("/auth/login", json=creds)).status_code == 200
@@ -1,7 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+from unittest import mock
+
 import pytest
-from api.ratelimit import reset_memory_rate_limiter
+from api.config import get_settings
+from api.ratelimit import (
+    RateLimitExceeded,
+    RateLimitRule,
+    consume_token,
+    rate_limit_many_or_raise,
+    reset_memory_rate_limiter,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -13,12 +23,59 @@ def _reset_rate_limit_between_tests():
 
 @pytest.mark.asyncio
 async def test_login_rate_limit(client):
-    last_status = None
-    for _ in range(6):
-        resp = await client.post(
-            "/auth/login",
-            json={"email": "rate@example.com", "password": "WrongPass123!"},
+    # Sent together: the limiter is atomic per request, so exactly one of six is refused.
+    responses = await asyncio.gather(
+        *(
+            client.post("/auth/login", json={"email": "rate@example.com", "password": "WrongPass123!"})
+            for _ in range(6)
         )
-        last_status = resp.status_code
-    assert last_status == 429
+    )
+    assert sorted(resp.status_code for resp in responses) == [401] * 5 + [429]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_many_reports_first_exhausted_bucket(client):
+    app = client._transport.app
+    redis = app.state.test_redis
+    if redis is None:
+        pytest.skip("fakeredis not installed")
+
+    rules = [
+        RateLimitRule("rlz:test:wide", 10, 60, "wide"),
+        RateLimitRule("rlz:test:narrow", 2, 60, "narrow"),
+    ]
+    settings = get_settings()
+    await rate_limit_many_or_raise(settings, redis, rules)
+    await rate_limit_many_or_raise(settings, redis, rules)
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        await rate_limit_many_or_raise(settings, redis, rules)
+    assert excinfo.value.detail == "narrow"
+
 
+@pytest.mark.asyncio
+async def test_token_bucket_reloads_script_after_script_flush(client):
+    redis = client._transport.app.state.test_redis
+    if redis is None:
+        pytest.skip("fakeredis not installed")
+
+    await redis.script_flush()
+    results = [await consume_token(redis, "rlg:test:bucket", 2, 60) for _ in range(3)]
+    assert results == [(True, 1.0), (True, 0.0), (False, 0.0)]
+    assert 0 < await redis.pttl("rlg:test:bucket") <= 60_000
+
+
+@pytest.mark.asyncio
+async def test_memory_fallback_consumes_nothing_when_a_bucket_rejects():
+    rules = [
+        RateLimitRule("rlz:test:mem:wide", 2, 60, "wide"),
+        RateLimitRule("rlz:test:mem:narrow", 1, 60, "narrow"),
+    ]
+    settings = get_settings()
+    with mock.patch("api.ratelimit.get_redis_client_by_url", mock.AsyncMock(return_value=None)):
+        await rate_limit_many_or_raise(settings, None, rules)
+        for _ in range(3):
+            with pytest.raises(RateLimitExceeded) as excinfo:
+                await rate_limit_many_or_raise(settings, None, rules)
+            assert excinfo.value.detail == "narrow"
+        # Rejected calls must not have drained the wide bucket.
+        await rate_limit_many_or_raise(settings, None, rules[:1])
@@ -21,7 +21,7 @@ def _ensure_admin():
                 session.flush()
             admin = User(
                 email="admin@example.com",
-                password_hash=hash_password("AdminPass123!"),
+                password_hash=hash_password("AdminPass123!", settings.bcrypt_rounds),
                 is_active=True,
             )
             admin.roles.append(admin_role)
@@ -60,3 +60,35 @@ async def test_rbac_enforcement(client):
     assert users_resp.status_code == 200
     payload = users_resp.json()
     assert "users" in payload
+
+
+@pytest.mark.asyncio
+async def test_current_user_cache_is_invalidated_by_admin_changes(client):
+    await client.post("/auth/register", json={"email": "cached@example.com", "password": "ChangeMe123!"})
+    tokens = (await client.post("/auth/login", json={"email": "cached@example.com", "password": "ChangeMe123!"})).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    first = await client.get("/auth/me", headers=headers)
+    assert first.status_code == 200
+
+    # Changed behind the app's back: the cached lookup keeps serving the user for a few seconds.
+    session = get_session_factory(get_settings())()
+    try:
+        session.query(User).filter(User.email == "cached@example.com").update({"is_active": False})
+        session.commit()
+    finally:
+        session.close()
+    cached = await client.get("/auth/me", headers=headers)
+    assert cached.status_code == 200
+    assert cached.json()["roles"] == first.json()["roles"] == ["user"]
+
+    _ensure_admin()
+    admin_tokens = (
+        await client.post("/auth/login", json={"email": "admin@example.com", "password": "AdminPass123!"})
+    ).json()
+    disable = await client.patch(
+        f"/users/{first.json()['id']}",
+        json={"is_active": False},
+        headers={"Authorization": f"Bearer {admin_tokens['access_token']}"},
+    )
+    assert disable.status_code == 200
+    assert (await client.get("/auth/me", headers=headers)).status_code == 403
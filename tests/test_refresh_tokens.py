@@ -18,6 +18,7 @@ from api.auth.service import AuthService, RefreshPersistenceError
 from api.config import get_settings
 from api.deps import get_redis
 from api.redis_client import close_all_cached_clients
+from api.security import decode_token
 
 def _get_app_from_client(client):
     app = getattr(client, "app", None)
@@ -57,6 +58,31 @@ async def test_refresh_rotation_db_ok(client: AsyncClient):
     assert follow_up.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_refresh_rotation_swaps_cached_jti(client: AsyncClient):
+    app = _get_app_from_client(client)
+    redis_instance = getattr(app.state, "test_redis", None) if app else None
+    if redis_instance is None:
+        pytest.skip("Redis not available for this test run")
+
+    settings = get_settings()
+    original = settings.refresh_persistence
+    settings.refresh_persistence = "redis"
+    try:
+        creds = await _register_and_login(client, _unique_email("swap"))
+        old_jti = decode_token(creds["refresh_token"], settings)["jti"]
+        assert await redis_instance.exists(f"refresh:{old_jti}")
+
+        refresh_resp = await client.post("/auth/refresh", json={"refresh_token": creds["refresh_token"]})
+        assert refresh_resp.status_code == 200
+        new_jti = decode_token(refresh_resp.json()["refresh_token"], settings)["jti"]
+
+        assert not await redis_instance.exists(f"refresh:{old_jti}")
+        assert await redis_instance.exists(f"refresh:{new_jti}")
+    finally:
+        settings.refresh_persistence = original
+
+
 @pytest.mark.asyncio
 async def test_refresh_redis_miss_db_hit(client: AsyncClient):
     creds = await _register_and_login(client, _unique_email("miss"))